@@ -1,3 +1,4 @@
 from .audio_capture import AudioCapture
+from .ring_buffer import RingBuffer
 
-__all__ = ['AudioCapture']
+__all__ = ['AudioCapture', 'RingBuffer']
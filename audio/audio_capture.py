@@ -2,19 +2,28 @@ import pyaudio
 import numpy as np
 import threading
 import queue
+import time
+import wave
 from typing import Optional, Callable
 from config import AudioConfig
+from .ring_buffer import RingBuffer
 
 
 class AudioCapture:
-    def __init__(self):
+    def __init__(self, block_size=None):
         self.config = AudioConfig()
         self.audio = pyaudio.PyAudio()
         self.stream: Optional[pyaudio.Stream] = None
         self.is_running = False
-        self.audio_queue = queue.Queue(maxsize=self.config.BUFFER_SIZE)
+        # Capture samples go through a lock-free ring instead of a queue of arrays. It must hold
+        # two of the consumer's blocks, whatever their size, so a read can always be satisfied
+        block_size = block_size or self.config.CHUNK_SIZE
+        ring_frames = max(self.config.BUFFER_SIZE * self.config.CHUNK_SIZE, 2 * block_size)
+        self.ring_buffer = RingBuffer(ring_frames * self.config.CHANNELS)
+        self._silence = bytes(2 * self.config.CHUNK_SIZE * self.config.CHANNELS)
         self.output_queue = queue.Queue(maxsize=self.config.BUFFER_SIZE)
         self.callback_function: Optional[Callable] = None
+        self.file_processing_thread: Optional[threading.Thread] = None
 
     def list_devices(self):
         print("\n=== Available Audio Devices ===")
@@ -42,18 +51,17 @@ class AudioCapture:
         if status:
             print(f"Audio callback status: {status}")
 
-        audio_data = np.frombuffer(in_data, dtype=np.int16)
-
-        try:
-            self.audio_queue.put_nowait(audio_data)
-        except queue.Full:
-            pass
+        if in_data is not None:
+            self.ring_buffer.write(np.frombuffer(in_data, dtype=np.int16))
 
         try:
             output_data = self.output_queue.get_nowait()
             output_bytes = output_data.astype(np.int16).tobytes()
         except queue.Empty:
-            output_bytes = np.zeros(frame_count, dtype=np.int16).tobytes()
+            if frame_count == self.config.CHUNK_SIZE:
+                output_bytes = self._silence
+            else:
+                output_bytes = bytes(2 * frame_count * self.config.CHANNELS)
 
         return (output_bytes, pyaudio.paContinue)
 
@@ -179,13 +187,14 @@ class AudioCapture:
                     if not data:
                         break
                     audio_data = np.frombuffer(data, dtype=np.int16)
-                    self.audio_queue.put(audio_data)
+                    # Unlike the device callback, a file can wait for room in the ring
+                    while self.is_running and len(audio_data) > self.ring_buffer.capacity - self.ring_buffer.available:
+                        time.sleep(0.005)
+                    self.ring_buffer.write(audio_data)
         except FileNotFoundError:
             print(f"Error: File not found at {filepath}")
         except Exception as e:
             print(f"Error processing file: {e}")
-        finally:
-            self.audio_queue.put(None) # Signal end of file
 
     def stop(self):
         if not self.is_running:
@@ -202,11 +211,7 @@ class AudioCapture:
             self.file_processing_thread.join(timeout=2.0)
 
 
-        while not self.audio_queue.empty():
-            try:
-                self.audio_queue.get_nowait()
-            except queue.Empty:
-                break
+        self.ring_buffer.clear()
 
         while not self.output_queue.empty():
             try:
@@ -216,11 +221,17 @@ class AudioCapture:
 
         print("Audio capture stopped")
 
-    def read_audio(self, timeout=0.1):
-        try:
-            return self.audio_queue.get(timeout=timeout)
-        except queue.Empty:
-            return None
+    def read_audio(self, timeout=0.1, n_frames=None):
+        """Read the next ``n_frames`` frames (default CHUNK_SIZE) of interleaved samples.
+
+        Blocks need not match the device buffer size; returns None on timeout.
+        """
+        if n_frames is None:
+            n_frames = self.config.CHUNK_SIZE
+        return self.ring_buffer.read(n_frames * self.config.CHANNELS, timeout=timeout)
+
+    def get_buffer_stats(self):
+        return self.ring_buffer.get_stats()
 
     def write_audio(self, audio_data):
         try:
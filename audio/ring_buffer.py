@@ -0,0 +1,82 @@
+import time
+import numpy as np
+
+
+class RingBuffer:
+    """Preallocated single-producer / single-consumer ring of samples.
+
+    The producer (the PortAudio callback) only ever advances the write index
+    and the consumer (the processing thread) only the read index. Indices
+    grow monotonically and each is published after its samples are copied,
+    so neither side takes a lock or allocates on the producer path.
+
+    A write that does not fit is dropped whole and counted as an overrun. A
+    read that times out short while the producer is still writing is counted
+    as an underrun; one that times out on an idle stream is not.
+    """
+
+    def __init__(self, capacity, dtype=np.int16, poll_interval=0.002):
+        self.capacity = int(capacity)
+        self.poll_interval = poll_interval
+        self._buffer = np.zeros(self.capacity, dtype=dtype)
+        self._write_index = 0
+        self._read_index = 0
+
+        self.overruns = 0
+        self.overrun_samples = 0
+        self.underruns = 0
+
+    @property
+    def available(self):
+        return self._write_index - self._read_index
+
+    def write(self, samples):
+        n = len(samples)
+        if n > self.capacity - self.available:
+            self.overruns += 1
+            self.overrun_samples += n
+            return False
+
+        start = self._write_index % self.capacity
+        first = min(n, self.capacity - start)
+        self._buffer[start:start + first] = samples[:first]
+        self._buffer[:n - first] = samples[first:]
+
+        self._write_index += n
+        return True
+
+    def read(self, n_samples, timeout=None):
+        """Return the next ``n_samples`` samples, or None if they do not arrive within ``timeout``."""
+        if n_samples > self.capacity:
+            raise ValueError(f"Cannot read {n_samples} samples from a ring of {self.capacity}")
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        write_index = self._write_index
+        while self.available < n_samples:
+            if deadline is not None and time.monotonic() >= deadline:
+                # Only a producer that is writing, just not fast enough, starves the consumer
+                if self._write_index != write_index:
+                    self.underruns += 1
+                return None
+            time.sleep(self.poll_interval)
+
+        start = self._read_index % self.capacity
+        first = min(n_samples, self.capacity - start)
+        out = np.empty(n_samples, dtype=self._buffer.dtype)
+        out[:first] = self._buffer[start:start + first]
+        out[first:] = self._buffer[:n_samples - first]
+
+        self._read_index += n_samples
+        return out
+
+    def clear(self):
+        # Consumer side only: discard everything written so far
+        self._read_index = self._write_index
+
+    def get_stats(self):
+        return {
+            'overruns': self.overruns,
+            'overrun_samples': self.overrun_samples,
+            'underruns': self.underruns,
+            'fill': self.available / self.capacity,
+        }
@@ -1,26 +1,41 @@
+import itertools
 import numpy as np
 import threading
 import time
-import wave
 import os
 import queue
-from datetime import datetime
-from audio import AudioCapture
-from dsp import SpectralSubtraction, WienerFilter
+from dsp import StreamingSTFT, SpectralSubtraction, WienerFilter, create_noise_estimator
 from ml import VoiceActivityDetector
-from config import AudioConfig, RecordingConfig
-from collections import deque
-from utils.audio_utils import highpass_filter
+from pipeline import (ApplyGain, Block, FrameTimer, NoiseEstimation, Pipeline, PlaybackSink, RecordingSink,
+                      STFTAnalysis, STFTSynthesis, SpectralSubtractionGain, SpectrogramTap, StatsSink, VoiceActivity,
+                      WienerGain, capture_source, drain)
+from config import AudioConfig, BatchConfig, DSPConfig, ProfilingConfig, RecordingConfig
+from utils.audio_utils import HighPassFilter, SpikeSuppressor
+from utils.latency import LatencyMonitor
+from utils.spectrogram import SpectrogramBuffer
+from utils.wav_recorder import StreamingWavRecorder
 
 
 class AudioProcessor:
-    def __init__(self):
-        self.audio_capture = AudioCapture()
+    def __init__(self, enable_capture=True):
+        # Offline processing needs no audio device, so PyAudio is only loaded for live use
+        self.config = AudioConfig()
+        self.block_size = self.config.PROCESS_BLOCK_SIZE or self.config.CHUNK_SIZE
+        if enable_capture:
+            from audio import AudioCapture
+            self.audio_capture = AudioCapture(block_size=self.block_size)
+        else:
+            self.audio_capture = None
+        self.channels = self.config.CHANNELS
         self.spectral_subtraction = SpectralSubtraction()
         self.wiener_filter = WienerFilter()
-        self.vad = VoiceActivityDetector()
-        self.config = AudioConfig()
+        # Shared by both filters and all channels: one batched forward and inverse FFT per hop
+        self.stft = StreamingSTFT(channels=self.channels)
+        # One noise power estimate per channel, also shared by both filters
+        self.noise_estimator = create_noise_estimator(self.config.RATE / self.stft.hop_length)
+        self.vads = [VoiceActivityDetector() for _ in range(self.channels)]
         self.recording_config = RecordingConfig()
+        self.profiling_config = ProfilingConfig()
 
         self.is_processing = False
         self.processing_thread = None
@@ -29,26 +44,51 @@ class AudioProcessor:
         self.use_spectral_subtraction = True
         self.use_wiener_filter = True
         self.use_adaptive_noise = True
+        self.use_fused_pipeline = DSPConfig.FUSED_PIPELINE
+        # Off by default: enhanced audio played through speakers feeds back into the microphone.
+        # Can be switched while processing runs
+        self.use_playback = self.config.PLAYBACK
+        # Built on first use and rebuilt only when a switch or a part of the chain changes
+        self._pipeline = None
+        self._pipeline_key = None
+
+        self.last_is_speech = False
+        self.last_speech_prob = 0.0
+        # Display copy of the spectra, only filled once a viewer enables it
+        self.spectrogram = None
+
+        # Per-stage timings; the end-to-end frame time is checked against the frame period
+        self.latency = LatencyMonitor(
+            deadline_ms=1000.0 * self.block_size / self.config.RATE,
+            jsonl_path=self.profiling_config.LATENCY_JSONL_PATH,
+            buckets_per_decade=self.profiling_config.LATENCY_BUCKETS_PER_DECADE)
 
         self.is_recording = False
-        self.wav_file = None
-        self.wav_writer = None
-        self.recorded_frames = []
-
-        # Prebuffer for recording speech-only mode
-        prebuffer_frames = getattr(self.recording_config, 'RECORD_PREBUFFER_FRAMES', 3)
-        self._record_prebuffer = deque(maxlen=prebuffer_frames)
-        self._recording_active_segment = False
-        self._post_silence_counter = 0
+        self.recorder = None
+        self._record_lock = threading.Lock()
+        self._recording_start_time = None
+        # Always in the live chain: it keeps a short prebuffer of processed blocks to include
+        # just before speech, and writes to the recorder while one is attached
+        self._recording_sink = RecordingSink(
+            speech_only=getattr(self.recording_config, 'RECORD_SPEECH_ONLY', True),
+            threshold=getattr(self.recording_config, 'RECORD_VAD_THRESHOLD', 0.5),
+            prebuffer_blocks=getattr(self.recording_config, 'RECORD_PREBUFFER_FRAMES', 3),
+            post_blocks=getattr(self.recording_config, 'RECORD_POST_FRAMES', 5),
+            lock=self._record_lock, latency=self.latency)
+        self._frame_timer = FrameTimer(self.latency)
 
         self.stats = {
             'frames_processed': 0,
             'speech_frames': 0,
             'noise_frames': 0,
             'current_speech_prob': 0.0,
+            'channel_speech_prob': [0.0] * self.channels,
             'processing_time_ms': 0.0,
+            'algorithmic_latency_ms': self.stft.latency_ms(self.config.RATE),
             'recording_time': 0.0,
-            'recorded_frames': 0
+            'recorded_frames': 0,
+            'overruns': 0,
+            'underruns': 0
         }
 
         os.makedirs(self.recording_config.RECORDINGS_DIR, exist_ok=True)
@@ -61,162 +101,221 @@ class AudioProcessor:
         start_time = time.time()
 
         while time.time() - start_time < duration_seconds:
-            audio_data = self.audio_capture.read_audio(timeout=0.1)
+            audio_data = self.audio_capture.read_audio(timeout=0.1, n_frames=self.block_size)
             if audio_data is not None:
-                noise_frames.append(audio_data)
+                noise_frames.append(self._deinterleave(audio_data))
             time.sleep(0.01)
 
         if len(noise_frames) > 0:
-            self.spectral_subtraction.noise_frames = noise_frames
-            self.spectral_subtraction.finalize_noise_profile()
+            self.calibrate_from_frames(noise_frames)
+        else:
+            print("Warning: No audio frames captured during calibration")
 
-            self.wiener_filter.estimate_noise_power(noise_frames)
+    def calibrate_from_frames(self, noise_frames):
+        """Calibrate from noise-only frames, each (n_samples,) or (n_channels, n_samples)."""
+        noise_frames = [np.atleast_2d(frame) for frame in noise_frames]
 
-            self.vad.calibrate_noise_floor(noise_frames)
+        noise = np.concatenate(noise_frames, axis=-1)
+        self.noise_estimator.initialize(np.abs(self.stft.analyze_signal(noise)) ** 2)
+        print(f"Noise estimate initialized from {len(noise_frames)} frames")
 
-            print(f"Calibration complete with {len(noise_frames)} frames")
-        else:
-            print("Warning: No audio frames captured during calibration")
+        for channel, vad in enumerate(self.vads):
+            vad.calibrate_noise_floor([frame[channel] for frame in noise_frames])
+
+        print(f"Calibration complete with {len(noise_frames)} frames")
+
+    def process_signal(self, audio_data, sample_rate, noise_data=None, vectorized=False):
+        """Run the enhancement chain over a whole int16 signal as fast as the CPU allows.
+
+        The chain is rebuilt for the signal and calibrated from ``noise_data``,
+        by default the first NOISE_PROFILE_DURATION seconds of the signal. The
+        result has the input's length, with the STFT latency removed.
+
+        ``vectorized`` transforms BatchConfig.VECTOR_BLOCK_FRAMES capture frames
+        at a time and computes their gains in bulk instead of looping per frame.
+        VAD decisions are still made per CHUNK_SIZE frame, so both modes agree.
+
+        ``audio_data`` is (n_samples,) or (n_samples, n_channels), as read from
+        a WAV file; channels are enhanced independently, in one batched chain,
+        and returned in the same layout.
+        """
+        audio_data = np.asarray(audio_data, dtype=np.int16)
+        if noise_data is None:
+            noise_data = audio_data[:int(self.config.NOISE_PROFILE_DURATION * sample_rate)]
+
+        output = list(self.process_stream([audio_data], sample_rate, noise_data, vectorized))
+        return np.concatenate(output) if output else audio_data[:0].copy()
+
+    def prepare(self, sample_rate, channels=1, noise_data=None):
+        """Rebuild the chain for a signal and calibrate it from ``noise_data``, if given.
+
+        ``noise_data`` is (n_samples,) or (n_samples, n_channels) noise-only audio.
+        """
+        self._reset_chain(sample_rate, channels)
+        if noise_data is None:
+            return
+
+        chunk_size = self.config.CHUNK_SIZE
+        noise_data = np.atleast_2d(np.asarray(noise_data, dtype=np.int16).T)
+        noise_frames = [noise_data[:, i:i + chunk_size] for i in range(0, noise_data.shape[-1], chunk_size)]
+        if len(noise_frames) > 0:
+            self.calibrate_from_frames(noise_frames)
+
+    def process_stream(self, chunks, sample_rate, noise_data, vectorized=False):
+        """Enhance a signal that arrives as consecutive chunks, yielding the output piece by piece.
+
+        Chunks have the layout of ``process_signal``'s input, and so do the
+        pieces, which together have the input's length; the result equals
+        ``process_signal`` on the whole signal. At most one block of samples is
+        buffered, so e.g. ``WavReader.chunks`` streams files of any size
+        through the chain in constant memory.
+        """
+        chunks = iter(chunks)
+        first = next(chunks, None)
+        if first is None:
+            return
+        single_channel = np.ndim(first) == 1
+        self.prepare(sample_rate, 1 if single_channel else np.shape(first)[1], noise_data)
+
+        chunk_size = self.config.CHUNK_SIZE
+        block_size = chunk_size * BatchConfig.VECTOR_BLOCK_FRAMES if vectorized else chunk_size
+        # The first `latency` output samples precede the signal; the rest are yielded up to its length
+        skip = self.stft.latency_samples
+        remaining = 0
+        pending = np.zeros((self.channels, 0), dtype=np.int16)
+
+        for chunk in itertools.chain([first], chunks):
+            chunk = np.atleast_2d(np.asarray(chunk, dtype=np.int16).T)
+            remaining += chunk.shape[-1]
+            pending = np.concatenate((pending, chunk), axis=-1)
+            n_full = pending.shape[-1] // block_size * block_size
+
+            for i in range(0, n_full, block_size):
+                output = self._enhance(Block(pending[:, i:i + block_size], chunk_size)).output
+                skip, remaining, output = self._trim_output(output, skip, remaining)
+                if output.shape[-1] > 0:
+                    yield output[0] if single_channel else output.T
+            pending = pending[:, n_full:]
+
+        # Pad enough to push the last input sample through the overlap-add
+        padding = np.zeros((self.channels, self.stft.latency_samples + self.stft.hop_length), dtype=np.int16)
+        pending = np.concatenate((pending, padding), axis=-1)
+        for i in range(0, pending.shape[-1], block_size):
+            output = self._enhance(Block(pending[:, i:i + block_size], chunk_size)).output
+            skip, remaining, output = self._trim_output(output, skip, remaining)
+            if output.shape[-1] > 0:
+                yield output[0] if single_channel else output.T
+
+    @staticmethod
+    def _trim_output(output, skip, remaining):
+        dropped = min(skip, output.shape[-1])
+        output = output[:, dropped:dropped + remaining]
+        return skip - dropped, remaining - output.shape[-1], output
+
+    def _reset_chain(self, sample_rate, channels=1):
+        self.channels = channels
+        self.spectral_subtraction = SpectralSubtraction()
+        self.wiener_filter = WienerFilter()
+        self.stft = StreamingSTFT(channels=channels)
+        self.noise_estimator = create_noise_estimator(sample_rate / self.stft.hop_length)
+        self.vads = [VoiceActivityDetector(sample_rate) for _ in range(channels)]
+
+    def _deinterleave(self, audio_data):
+        # Capture delivers interleaved samples; the chain works on (channels, samples)
+        return audio_data.reshape(-1, self.channels).T
 
     def _processing_loop(self):
         print("Processing loop started")
-        recording_start_time = time.time()
-
         while self.is_processing:
             try:
-                audio_data = self.audio_capture.read_audio(timeout=0.1)
-
-                if audio_data is None:
-                    continue
-
-                start_time = time.time()
-
-                if self.bypass_mode:
-                    processed_audio = audio_data
-                    # still compute speech probability for monitoring even when bypassed
-                    try:
-                        prob = float(self.vad.get_speech_probability(audio_data))
-                    except Exception:
-                        prob = 0.0
-                    self.stats['current_speech_prob'] = prob
-                    is_speech = False
-                else:
-                    processed_audio = self._process_frame(audio_data)
-
-                    is_speech = self.vad.detect(audio_data)
-                    try:
-                        self.stats['current_speech_prob'] = float(self.vad.get_speech_probability(audio_data))
-                    except Exception:
-                        self.stats['current_speech_prob'] = 0.0
-
-                    if is_speech:
-                        self.stats['speech_frames'] += 1
-                    else:
-                        self.stats['noise_frames'] += 1
-
-                # Always keep a short prebuffer of processed frames (int16) to include just before speech
-                try:
-                    self._record_prebuffer.append(processed_audio)
-                except Exception:
-                    pass
-
-                if self.is_recording:
-                    # Decide whether to append this frame based on recording policy
-                    record_speech_only = getattr(self.recording_config, 'RECORD_SPEECH_ONLY', True)
-                    vad_threshold = getattr(self.recording_config, 'RECORD_VAD_THRESHOLD', 0.5)
-                    post_frames_allowed = getattr(self.recording_config, 'RECORD_POST_FRAMES', 5)
-
-                    if record_speech_only:
-                        prob = float(self.stats.get('current_speech_prob', 0.0))
-                        if prob >= vad_threshold:
-                            # flush prebuffer if entering speech segment
-                            if not self._recording_active_segment:
-                                while len(self._record_prebuffer) > 0:
-                                    f = self._record_prebuffer.popleft()
-                                    # apply high-pass filter to reduce thumps
-                                    try:
-                                        sample_rate = getattr(self.audio_capture, 'actual_rate', self.config.RATE)
-                                        f = highpass_filter(f, sample_rate=sample_rate,
-                                                            cutoff_hz=self.recording_config.RECORD_HP_CUTOFF_HZ)
-                                    except Exception:
-                                        pass
-                                    self.recorded_frames.append(f)
-                                self._recording_active_segment = True
-                                self._post_silence_counter = 0
-
-                            # append current frame (filtered)
-                            try:
-                                sample_rate = getattr(self.audio_capture, 'actual_rate', self.config.RATE)
-                                filtered = highpass_filter(processed_audio, sample_rate=sample_rate,
-                                                           cutoff_hz=self.recording_config.RECORD_HP_CUTOFF_HZ)
-                            except Exception:
-                                filtered = processed_audio
-                            self.recorded_frames.append(filtered)
-                            self._post_silence_counter = 0
-
-                        else:
-                            # below threshold: if we were recording, allow a few post frames
-                            if self._recording_active_segment:
-                                if self._post_silence_counter < post_frames_allowed:
-                                    try:
-                                        sample_rate = getattr(self.audio_capture, 'actual_rate', self.config.RATE)
-                                        filtered = highpass_filter(processed_audio, sample_rate=sample_rate,
-                                                                   cutoff_hz=self.recording_config.RECORD_HP_CUTOFF_HZ)
-                                    except Exception:
-                                        filtered = processed_audio
-                                    self.recorded_frames.append(filtered)
-                                    self._post_silence_counter += 1
-                                else:
-                                    # end of speech segment
-                                    self._recording_active_segment = False
-                                    self._post_silence_counter = 0
-                            else:
-                                # not in active speech segment; do not record
-                                pass
-                    else:
-                        # record everything (but apply HP filter to reduce thumps)
-                        try:
-                            sample_rate = getattr(self.audio_capture, 'actual_rate', self.config.RATE)
-                            filtered = highpass_filter(processed_audio, sample_rate=sample_rate,
-                                                       cutoff_hz=self.recording_config.RECORD_HP_CUTOFF_HZ)
-                        except Exception:
-                            filtered = processed_audio
-                        self.recorded_frames.append(filtered)
-
-                    self.stats['recorded_frames'] = len(self.recorded_frames)
-                    self.stats['recording_time'] = time.time() - recording_start_time
-
-                self.stats['frames_processed'] += 1
-                processing_time = (time.time() - start_time) * 1000
-                self.stats['processing_time_ms'] = processing_time
-
+                drain(self._live_chain())
             except (queue.Empty, queue.Full, IOError) as e:
+                # The chain ends with the error; a new one picks up at the next block
                 print(f"Error in processing loop: {e}")
                 time.sleep(0.01)
 
         print("Processing loop ended")
 
-    def _process_frame(self, audio_frame):
-        audio_float = audio_frame.astype(np.float32)
+    def _live_chain(self):
+        """capture -> enhance -> playback -> recording -> stats, timed per block.
 
-        is_speech = self.vad.detect(audio_frame)
+        Blocks are only read from the capture buffer as fast as the chain handles them.
+        """
+        blocks = capture_source(self.audio_capture, self.block_size, self.channels, lambda: self.is_processing)
+        blocks = self.enhance(self._frame_timer(blocks))
+        blocks = PlaybackSink(self.audio_capture, lambda: self.use_playback)(blocks)
+        return StatsSink(self.stats)(self._recording_sink(blocks))
 
+    def _process_frame(self, audio_frame):
+        return self._process_block(audio_frame)
+
+    def _process_block(self, audio_block, vad_frame_size=None):
+        """Enhance a block of samples, taking one VAD decision per ``vad_frame_size`` samples.
+
+        STFT frames and gains for the whole block are computed in bulk; by
+        default the block is a single VAD frame, as in live processing.
+        ``audio_block`` is (n_samples,) or (n_channels, n_samples); all
+        channels share the batched transforms, and each has its own VAD and
+        noise estimate.
+        """
+        output = self._enhance(Block(audio_block, vad_frame_size)).output
+        return output[0] if np.ndim(audio_block) == 1 else output
+
+    def enhancement_stages(self):
+        """The enhancement chain as pipeline stages, following the current filter switches."""
+        fused = self.use_fused_pipeline
+        stages = [STFTAnalysis(self.stft), VoiceActivity(self.vads, self.stft),
+                  NoiseEstimation(self.noise_estimator, self.use_adaptive_noise)]
         if self.use_spectral_subtraction:
-            if self.use_adaptive_noise:
-                audio_float = self.spectral_subtraction.adaptive_process(audio_float, is_speech)
-            else:
-                audio_float = self.spectral_subtraction.process(audio_float)
-
+            stages.append(SpectralSubtractionGain(self.spectral_subtraction, fused))
         if self.use_wiener_filter:
-            if self.use_adaptive_noise:
-                audio_float = self.wiener_filter.adaptive_process(audio_float, is_speech)
-            else:
-                audio_float = self.wiener_filter.process(audio_float)
-
-        audio_float = np.clip(audio_float, -32768, 32767)
-        processed_audio = audio_float.astype(np.int16)
-
-        return processed_audio
+            stages.append(WienerGain(self.wiener_filter, fused))
+        if fused:
+            stages.append(ApplyGain())
+        if self.spectrogram is not None:
+            stages.append(SpectrogramTap(self.spectrogram, self.noise_estimator))
+        stages.append(STFTSynthesis(self.stft))
+        return stages
+
+    def enhance(self, blocks):
+        """Pipeline stage running the enhancement chain on each Block, e.g. from a pipeline source.
+
+        The chain must match the blocks' sample rate and channels; see ``prepare``.
+        In bypass mode blocks pass through unchanged, with speech probabilities
+        still computed for monitoring.
+        """
+        for block in blocks:
+            yield self._bypass(block) if self.bypass_mode else self._enhance(block)
+
+    def _enhancement_pipeline(self):
+        # Switches flipped from the GUI apply at the next block; a tuple compare per block
+        # is all it costs while nothing changes
+        key = (self.use_fused_pipeline, self.use_spectral_subtraction, self.use_wiener_filter,
+               self.use_adaptive_noise, self.stft, self.vads, self.noise_estimator,
+               self.spectral_subtraction, self.wiener_filter, self.spectrogram)
+        if self._pipeline is None or key != self._pipeline_key:
+            self._pipeline = Pipeline(self.enhancement_stages(), self.latency)
+            self._pipeline_key = key
+        return self._pipeline
+
+    def _enhance(self, block):
+        block = self._enhancement_pipeline().process(block)
+
+        # Speech on any channel counts for recording and the overall statistics
+        self.last_is_speech = bool(np.any(block.channel_speech))
+        self.last_speech_prob = float(np.max(block.channel_probability))
+        return block
+
+    def _bypass(self, block):
+        try:
+            block.channel_probability = np.array([vad.get_speech_probability(channel)
+                                                  for vad, channel in zip(self.vads, block.audio)], dtype=float)
+        except Exception:
+            block.channel_probability = np.zeros(len(self.vads))
+        block.output = block.audio
+        self.last_is_speech = False
+        self.last_speech_prob = float(np.max(block.channel_probability))
+        return block
 
     def start_processing(self, input_device=None, output_device=None):
         if self.is_processing:
@@ -225,6 +324,31 @@ class AudioProcessor:
 
         self.audio_capture.start(input_device, output_device)
 
+        self.stft.reset()
+        self.wiener_filter.reset()
+        sample_rate = getattr(self.audio_capture, 'actual_rate', self.config.RATE)
+        self.stats['algorithmic_latency_ms'] = self.stft.latency_ms(sample_rate)
+        # Estimator time constants are counted in STFT frames, so they follow the device rate;
+        # a calibrated estimate carries over
+        noise_power = self.noise_estimator.noise_power
+        self.noise_estimator = create_noise_estimator(sample_rate / self.stft.hop_length)
+        if noise_power is not None:
+            self.noise_estimator.initialize(noise_power[..., np.newaxis, :])
+        try:
+            for vad in self.vads:
+                vad.sample_rate = sample_rate
+                if vad.model is not None:
+                    # Live VAD frames are whole blocks
+                    vad.model.check_input(sample_rate, self.block_size)
+        except ValueError:
+            self.audio_capture.stop()
+            raise
+        if self.spectrogram is not None:
+            self.spectrogram.sample_rate = sample_rate
+            self.spectrogram.clear()
+        self.latency.set_deadline(1000.0 * self.block_size / sample_rate)
+        self.latency.reset()
+
         self.is_processing = True
         self.processing_thread = threading.Thread(target=self._processing_loop, daemon=True)
         self.processing_thread.start()
@@ -244,6 +368,12 @@ class AudioProcessor:
 
         print("Audio processing stopped")
 
+    def enable_spectrogram(self, history=200, n_display_bins=128, decimation=2):
+        """Start sharing input/enhanced magnitudes and noise estimates through a SpectrogramBuffer."""
+        sample_rate = getattr(self.audio_capture, 'actual_rate', self.config.RATE)
+        self.spectrogram = SpectrogramBuffer(self.stft.n_bins, sample_rate, history, n_display_bins, decimation)
+        return self.spectrogram
+
     def toggle_bypass(self):
         self.bypass_mode = not self.bypass_mode
         return self.bypass_mode
@@ -252,10 +382,28 @@ class AudioProcessor:
         if self.is_recording:
             print("Already recording")
             return False
+        sample_rate = getattr(self.audio_capture, 'actual_rate', self.config.RATE)
+        # High-pass filter to reduce thumps, then suppress clicks; both keep
+        # per-channel state across blocks so the work is done as blocks arrive
+        highpass = HighPassFilter(sample_rate=sample_rate, cutoff_hz=self.recording_config.RECORD_HP_CUTOFF_HZ)
+        despiker = SpikeSuppressor(window=self.recording_config.RECORD_SPIKE_WINDOW,
+                                   threshold=self.recording_config.RECORD_SPIKE_THRESHOLD)
+        self.recorder = StreamingWavRecorder(
+            self.recording_config.RECORDINGS_DIR,
+            sample_rate=sample_rate,
+            channels=self.config.CHANNELS,
+            max_file_seconds=self.recording_config.RECORD_MAX_FILE_SECONDS,
+            max_file_bytes=self.recording_config.RECORD_MAX_FILE_BYTES,
+            flush_seconds=self.recording_config.RECORD_FLUSH_SECONDS,
+            queue_frames=self.recording_config.RECORD_QUEUE_FRAMES,
+            segment_index_format=self.recording_config.RECORD_SEGMENT_INDEX
+            if getattr(self.recording_config, 'RECORD_SPEECH_ONLY', True) else None)
+        self.recorder.start()
         self.is_recording = True
-        self.recorded_frames = []
+        self._recording_start_time = time.time()
         self.stats['recorded_frames'] = 0
         self.stats['recording_time'] = 0.0
+        self._recording_sink.start(self.recorder, highpass, despiker)
         print("Recording started - Enhanced audio will be saved")
         return True
 
@@ -264,91 +412,48 @@ class AudioProcessor:
             print("Not currently recording")
             return None
 
-        self.is_recording = False
-
-        # If no frames were collected in the processed buffer, try to drain raw frames
-        # from the audio capture queue as a fallback (best-effort).
-        if len(self.recorded_frames) == 0:
-            try:
-                drained = []
-                while True:
-                    frame = self.audio_capture.audio_queue.get_nowait()
-                    drained.append(frame)
-                    if len(drained) >= 100:
-                        break
-                if len(drained) > 0:
-                    print(f"Drained {len(drained)} raw frames from audio queue as fallback for recording")
-                    # convert raw frames (int16) to numpy arrays and use them
-                    self.recorded_frames = drained
-                else:
-                    print("No audio frames recorded and audio queue empty")
-                    return None
-            except Exception:
-                print("No audio frames recorded and unable to drain audio queue")
-                return None
-
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"enhanced_speech_{timestamp}.wav"
-        filepath = os.path.join(self.recording_config.RECORDINGS_DIR, filename)
+        with self._record_lock:
+            self.is_recording = False
+            self._recording_sink.stop()
 
-        try:
-            # Concatenate frames which may already be numpy arrays
-            audio_data = np.concatenate([np.asarray(f) for f in self.recorded_frames])
-            audio_data = np.clip(audio_data, -32768, 32767).astype(np.int16)
-
-            # Simple click/spike suppression: short-duration high-amplitude
-            # transients (like mouse clicks) often show up as single-sample
-            # spikes. Replace samples that differ from a local median by a
-            # threshold with the median value.
-            def _remove_spikes(arr, window=5, thresh=3000):
-                try:
-                    if arr.size < window:
-                        return arr
-                    pad = window // 2
-                    padded = np.pad(arr, (pad, pad), mode='edge')
-                    med = np.empty_like(arr)
-                    for i in range(arr.size):
-                        seg = padded[i:i+window]
-                        med[i] = np.median(seg)
-                    diff = np.abs(arr - med)
-                    spikes = diff > thresh
-                    if np.any(spikes):
-                        out = arr.copy()
-                        out[spikes] = med[spikes]
-                        return out
-                    return arr
-                except Exception:
-                    return arr
+        paths = self.recorder.stop()
+        frames_recorded = self.recorder.frames_queued
+        self._update_recording_stats()
+        if self.recorder.dropped_frames > 0:
+            print(f"Warning: writer fell behind, {self.recorder.dropped_frames} frames were dropped")
 
-            try:
-                audio_data = _remove_spikes(audio_data, window=5, thresh=3000)
-            except Exception:
-                pass
-
-            with wave.open(filepath, 'w') as wav_file:
-                wav_file.setnchannels(self.config.CHANNELS)
-                wav_file.setsampwidth(2)
-                # Use the actual rate of the audio capture if available to avoid
-                # saving files at the wrong sample rate (which causes robotic/fast playback).
-                framerate = getattr(self.audio_capture, 'actual_rate', self.config.RATE)
-                wav_file.setframerate(framerate)
-                wav_file.writeframes(audio_data.tobytes())
+        if len(paths) == 0:
+            print("No audio frames recorded")
+            return None
 
+        for filepath in paths:
             print(f"Recording saved: {filepath}")
-            print(f"Duration: {self.stats['recording_time']:.2f}s, Frames: {len(self.recorded_frames)}")
+        print(f"Duration: {self.stats['recording_time']:.2f}s, Frames: {frames_recorded}")
 
-            self.recorded_frames = []
-            return filepath
+        return paths[0]
 
-        except (wave.Error, IOError) as e:
-            print(f"Error saving recording: {e}")
-            return None
+    def _update_recording_stats(self):
+        if self.recorder is not None:
+            self.stats['recorded_frames'] = self.recorder.frames_queued
+        if self._recording_start_time is not None:
+            self.stats['recording_time'] = time.time() - self._recording_start_time
 
     def get_stats(self):
-        return self.stats.copy()
+        self.stats['processing_time_ms'] = self._frame_timer.last_ns / 1e6
+        if self.is_recording:
+            self._update_recording_stats()
+        if self.audio_capture is not None:
+            buffer_stats = self.audio_capture.get_buffer_stats()
+            self.stats['overruns'] = buffer_stats['overruns']
+            self.stats['underruns'] = buffer_stats['underruns']
+        stats = self.stats.copy()
+        stats['latency'] = self.latency.summary()
+        return stats
 
     def cleanup(self):
         if self.is_recording:
             self.stop_recording()
         self.stop_processing()
-        self.audio_capture.cleanup()
+        self.latency.close()
+        if self.audio_capture is not None:
+            self.audio_capture.cleanup()
@@ -0,0 +1,336 @@
+import contextlib
+import itertools
+import os
+import sys
+import time
+import wave
+import numpy as np
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from audio_processor import AudioProcessor
+from config import AudioConfig, BatchConfig, DSPConfig
+from utils.audio_utils import get_wav_info, read_wav_range
+from utils.wav_reader import WavReader
+
+
+ENHANCED_SUFFIX = "_enhanced"
+
+# Each worker process builds its own AudioProcessor (and so its own filters and VAD) once
+_worker_processor = None
+_worker_vectorized = True
+
+
+def collect_wav_files(input_path, recursive=False):
+    if os.path.isfile(input_path):
+        return [input_path]
+
+    wav_files = []
+    for root, dirs, files in os.walk(input_path):
+        for name in sorted(files):
+            stem, ext = os.path.splitext(name)
+            # Skip our own outputs so re-running over a directory is idempotent
+            if ext.lower() == '.wav' and not stem.endswith(ENHANCED_SUFFIX):
+                wav_files.append(os.path.join(root, name))
+        if not recursive:
+            break
+
+    return sorted(wav_files)
+
+
+def output_path_for(input_path, input_root, output_dir=None):
+    stem = os.path.splitext(os.path.basename(input_path))[0]
+    filename = f"{stem}{ENHANCED_SUFFIX}.wav"
+
+    if output_dir is None:
+        return os.path.join(os.path.dirname(input_path), filename)
+
+    if os.path.isdir(input_root):
+        relative_dir = os.path.relpath(os.path.dirname(input_path), input_root)
+        return os.path.normpath(os.path.join(output_dir, relative_dir, filename))
+
+    return os.path.join(output_dir, filename)
+
+
+def enhance_file(input_path, output_path, processor=None, vectorized=True):
+    """Enhance one WAV file and return (audio seconds, processing seconds).
+
+    The input is memory-mapped and streamed through the chain in
+    BatchConfig.READ_BLOCK_SECONDS pieces, each written as soon as it is
+    enhanced, so memory use does not grow with the file.
+    """
+    if processor is None:
+        processor = AudioProcessor(enable_capture=False)
+
+    reader = WavReader(input_path)
+    try:
+        sample_rate = reader.sample_rate
+        noise_data = reader.read(0, int(AudioConfig.NOISE_PROFILE_DURATION * sample_rate))
+        chunks = reader.chunks(max(1, int(BatchConfig.READ_BLOCK_SECONDS * sample_rate)))
+        if reader.n_channels == 1:
+            noise_data = noise_data[:, 0]
+            chunks = (chunk[:, 0] for chunk in chunks)
+
+        os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+        processing_time = 0.0
+        try:
+            with wave.open(output_path, 'wb') as wav_file:
+                wav_file.setnchannels(reader.n_channels)
+                wav_file.setsampwidth(2)
+                wav_file.setframerate(sample_rate)
+
+                enhanced = processor.process_stream(chunks, sample_rate, noise_data, vectorized=vectorized)
+                while True:
+                    start_time = time.perf_counter()
+                    block = next(enhanced, None)
+                    processing_time += time.perf_counter() - start_time
+                    if block is None:
+                        break
+                    wav_file.writeframes(np.clip(block, -32768, 32767).astype(np.int16).tobytes())
+        except BaseException:
+            # Do not leave a truncated output behind, and do not hide the original error
+            if os.path.exists(output_path):
+                with contextlib.suppress(OSError):
+                    os.remove(output_path)
+            raise
+    finally:
+        reader.close()
+
+    print(f"Audio saved to {output_path}")
+    return reader.duration, processing_time
+
+
+def plan_chunks(n_samples, chunk_samples, align):
+    """Split [0, n_samples) into chunks whose boundaries are multiples of ``align``."""
+    chunk_samples = max(align, (chunk_samples // align) * align)
+    if n_samples == 0:
+        return [(0, 0)]
+    return [(start, min(start + chunk_samples, n_samples))
+            for start in range(0, n_samples, chunk_samples)]
+
+
+def _chunk_alignment():
+    # Chunk edges must fall on both the capture-frame grid and the STFT hop grid,
+    # so every worker sees exactly the frames the sequential run sees
+    return int(np.lcm(AudioConfig.CHUNK_SIZE, DSPConfig.HOP_LENGTH))
+
+
+def _round_up(value, align):
+    return -(-int(value) // align) * align
+
+
+def _init_worker(adaptive, vectorized):
+    global _worker_processor, _worker_vectorized
+    # Every chunk is calibrated on its own; the parent reports per file, so the
+    # workers' calibration messages would only interleave across processes
+    sys.stdout = open(os.devnull, 'w')
+    _worker_processor = AudioProcessor(enable_capture=False)
+    _worker_processor.use_adaptive_noise = adaptive
+    _worker_vectorized = vectorized
+
+
+def _enhance_chunk(task):
+    input_path, start, end, warmup, lookahead = task
+    try:
+        audio_data, sample_rate = read_wav_range(input_path, start - warmup, end + lookahead,
+                                                 mix_to_mono=False)
+        noise_samples = int(AudioConfig.NOISE_PROFILE_DURATION * sample_rate)
+        noise_data, _ = read_wav_range(input_path, 0, noise_samples, mix_to_mono=False)
+
+        start_time = time.perf_counter()
+        enhanced = _worker_processor.process_signal(audio_data, sample_rate, noise_data,
+                                                    vectorized=_worker_vectorized)
+        processing_time = time.perf_counter() - start_time
+
+        leading = min(warmup, start)
+        return input_path, enhanced[leading:leading + (end - start)], sample_rate, processing_time, None
+    except (OSError, EOFError, ValueError, wave.Error) as e:
+        return input_path, None, None, 0.0, str(e)
+
+
+def _report(name, audio_seconds, processing_seconds):
+    rtf = processing_seconds / audio_seconds if audio_seconds > 0 else 0.0
+    speed = 1.0 / rtf if rtf > 0 else float('inf')
+    print(f"{name}: {audio_seconds:.2f}s audio in {processing_seconds:.3f}s "
+          f"(RTF {rtf:.4f}, {speed:.1f}x real-time)")
+
+
+def _enhance_sequential(wav_files, input_path, output_dir, adaptive, vectorized):
+    processor = AudioProcessor(enable_capture=False)
+    processor.use_adaptive_noise = adaptive
+    total_audio = 0.0
+    outputs = []
+
+    for wav_path in wav_files:
+        output_path = output_path_for(wav_path, input_path, output_dir)
+        try:
+            audio_seconds, processing_seconds = enhance_file(wav_path, output_path, processor, vectorized)
+        except (OSError, EOFError, ValueError, wave.Error) as e:
+            print(f"Error enhancing {wav_path}: {e}")
+            continue
+
+        _report(os.path.basename(wav_path), audio_seconds, processing_seconds)
+        total_audio += audio_seconds
+        outputs.append(output_path)
+
+    return outputs, total_audio
+
+
+def _open_output(output_path, enhanced, sample_rate):
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    wav_file = wave.open(output_path, 'wb')
+    wav_file.setnchannels(enhanced.shape[1] if enhanced.ndim > 1 else 1)
+    wav_file.setsampwidth(2)
+    wav_file.setframerate(sample_rate)
+    return wav_file
+
+
+def _discard_output(wav_file, output_path):
+    with contextlib.suppress(OSError, wave.Error):
+        wav_file.close()
+    if os.path.exists(output_path):
+        with contextlib.suppress(OSError):
+            os.remove(output_path)
+
+
+def _enhance_parallel(wav_files, input_path, output_dir, adaptive, vectorized, jobs, chunk_seconds):
+    align = _chunk_alignment()
+    # An output sample depends on at most one frame of later input
+    lookahead = _round_up(DSPConfig.FFT_SIZE, align)
+
+    tasks = []
+    chunk_counts = {}
+    for wav_path in wav_files:
+        try:
+            n_samples, sample_rate = get_wav_info(wav_path)
+        except (OSError, EOFError, ValueError, wave.Error) as e:
+            print(f"Error enhancing {wav_path}: {e}")
+            continue
+
+        warmup_seconds = BatchConfig.WARMUP_SECONDS if adaptive else 0.0
+        warmup = _round_up(max(warmup_seconds * sample_rate, DSPConfig.FFT_SIZE), align)
+        chunks = plan_chunks(n_samples, int(chunk_seconds * sample_rate), align)
+
+        chunk_counts[wav_path] = len(chunks)
+        tasks.extend((wav_path, start, end, warmup, lookahead) for start, end in chunks)
+
+    print(f"Enhancing {len(chunk_counts)} file(s) as {len(tasks)} chunk(s) on {jobs} worker(s)")
+
+    total_audio = 0.0
+    outputs = []
+    # The file being written: its output, chunks seen, samples written, time and first error
+    current = None
+    # Enough chunks in flight to keep every worker busy, few enough to bound memory
+    max_in_flight = 2 * jobs
+
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker, initargs=(adaptive, vectorized)) as executor:
+        remaining = iter(tasks)
+        in_flight = deque(executor.submit(_enhance_chunk, task)
+                          for task in itertools.islice(remaining, max_in_flight))
+        try:
+            while in_flight:
+                # Results are taken in submission order, so chunks of a file arrive consecutively
+                wav_path, enhanced, sample_rate, processing_time, error = in_flight.popleft().result()
+                for task in itertools.islice(remaining, 1):
+                    in_flight.append(executor.submit(_enhance_chunk, task))
+
+                if current is None or current['path'] != wav_path:
+                    current = {'path': wav_path, 'output_path': output_path_for(wav_path, input_path, output_dir),
+                               'wav_file': None, 'chunks': 0, 'samples': 0, 'time': 0.0, 'error': None}
+                current['chunks'] += 1
+                current['time'] += processing_time
+                current['error'] = current['error'] or error
+
+                # Each chunk is appended to the output as soon as it arrives, never kept
+                if current['error'] is None:
+                    try:
+                        if current['wav_file'] is None:
+                            current['wav_file'] = _open_output(current['output_path'], enhanced, sample_rate)
+                            current['sample_rate'] = sample_rate
+                        current['wav_file'].writeframes(
+                            np.clip(enhanced, -32768, 32767).astype(np.int16).tobytes())
+                        current['samples'] += len(enhanced)
+                    except (OSError, wave.Error) as e:
+                        current['error'] = str(e)
+
+                if current['chunks'] < chunk_counts[wav_path]:
+                    continue
+
+                wav_file, current['wav_file'] = current['wav_file'], None
+                if current['error'] is not None:
+                    # Do not leave a truncated output behind
+                    if wav_file is not None:
+                        _discard_output(wav_file, current['output_path'])
+                    print(f"Error enhancing {wav_path}: {current['error']}")
+                    continue
+
+                wav_file.close()
+                print(f"Audio saved to {current['output_path']}")
+                audio_seconds = current['samples'] / current['sample_rate']
+                _report(os.path.basename(wav_path), audio_seconds, current['time'])
+                total_audio += audio_seconds
+                outputs.append(current['output_path'])
+        except BaseException:
+            if current is not None and current['wav_file'] is not None:
+                _discard_output(current['wav_file'], current['output_path'])
+            for future in in_flight:
+                future.cancel()
+            raise
+
+    return outputs, total_audio
+
+
+def enhance_path(input_path, output_dir=None, recursive=False, jobs=None, adaptive=True, chunk_seconds=None,
+                 vectorized=None):
+    """Enhance a WAV file or directory, spreading chunks over ``jobs`` processes.
+
+    ``jobs`` defaults to BatchConfig.WORKERS (0 = one per core); 1 runs in
+    this process. With ``adaptive`` off, the parallel output is bit-identical
+    to the sequential one.
+    """
+    wav_files = collect_wav_files(input_path, recursive)
+    if len(wav_files) == 0:
+        print(f"No WAV files found at {input_path}")
+        return []
+
+    if jobs is None:
+        jobs = BatchConfig.WORKERS
+    if jobs <= 0:
+        jobs = os.cpu_count() or 1
+    if chunk_seconds is None:
+        chunk_seconds = BatchConfig.CHUNK_SECONDS
+    if vectorized is None:
+        vectorized = BatchConfig.VECTORIZED
+
+    start_time = time.perf_counter()
+    if jobs == 1:
+        outputs, total_audio = _enhance_sequential(wav_files, input_path, output_dir, adaptive, vectorized)
+    else:
+        outputs, total_audio = _enhance_parallel(wav_files, input_path, output_dir, adaptive, vectorized,
+                                                 jobs, chunk_seconds)
+    wall_time = time.perf_counter() - start_time
+
+    _report(f"Total ({len(outputs)} file(s), wall clock)", total_audio, wall_time)
+    return outputs
+
+
+def add_enhance_arguments(parser):
+    parser.add_argument('input', help="WAV file or directory of WAV files")
+    parser.add_argument('-o', '--output-dir', default=None,
+                        help="Directory for enhanced files (default: next to each input)")
+    parser.add_argument('-r', '--recursive', action='store_true',
+                        help="Also enhance WAV files in subdirectories")
+    parser.add_argument('-j', '--jobs', type=int, default=None,
+                        help="Worker processes (default: BatchConfig.WORKERS, 0 = all cores, 1 = no pool)")
+    parser.add_argument('--chunk-seconds', type=float, default=None,
+                        help="Split long files into chunks of this length for the workers")
+    parser.add_argument('--no-adaptive', action='store_true',
+                        help="Keep the calibrated noise profile fixed (parallel output matches sequential exactly)")
+    parser.add_argument('--streaming', action='store_true',
+                        help="Process one capture frame at a time, exactly like the live path")
+
+
+def run_enhance(args):
+    outputs = enhance_path(args.input, args.output_dir, args.recursive, jobs=args.jobs,
+                           adaptive=not args.no_adaptive, chunk_seconds=args.chunk_seconds,
+                           vectorized=False if args.streaming else None)
+    return 0 if outputs else 1
@@ -0,0 +1,207 @@
+"""Score the enhancement chain against clean speech mixed with noise at controlled SNRs.
+
+Run from the project root:
+
+    python -m benchmarks.evaluate_quality
+    python -m benchmarks.evaluate_quality --fft-sizes 1024,2048 --hop-lengths 256,512 \\
+        --oversubtraction 1.5,2,3 -o quality.json
+    python -m benchmarks.evaluate_quality --clean speech.wav --noise noise.wav --snrs 0,5,10
+
+Every configuration is run over every noise type and SNR. Output is scored
+after the calibration lead-in with segmental SNR, log-spectral distance and
+STOI, and reported next to the CPU time the chain took, so settings can be
+picked on data. The unprocessed mixture is scored as a baseline row.
+"""
+import argparse
+import contextlib
+import io
+import itertools
+import json
+import sys
+import time
+import numpy as np
+from audio_processor import AudioProcessor
+from config import AudioConfig, BatchConfig, DSPConfig
+from utils.audio_utils import load_audio_from_wav, segmental_snr
+from utils.quality import log_spectral_distance, mix_at_snr, stoi
+from .run_benchmarks import environment_info, override_config
+from .signals import load_benchmark_audio, synthetic_speech
+
+
+NOISE_TYPES = ('white', 'pink')
+
+
+def generate_noise(kind, n_samples, seed=0):
+    rng = np.random.default_rng(seed)
+    white = rng.standard_normal(n_samples)
+    if kind == 'white':
+        return white
+    if kind == 'pink':
+        # 1/f power: scale the white spectrum by 1/sqrt(f)
+        spectrum = np.fft.rfft(white)
+        spectrum[1:] /= np.sqrt(np.arange(1, len(spectrum)))
+        return np.fft.irfft(spectrum, n=n_samples)
+    raise ValueError(f"Unknown noise type '{kind}'")
+
+
+def build_condition(clean, noise, snr_db, lead_in_samples):
+    """Prepend a noise-only lead-in for calibration and mix at ``snr_db`` over the speech.
+
+    Returns ``(reference, mixture)``: the clean signal and the int16 mixture,
+    both scaled by the same gain so they can be compared sample by sample.
+    """
+    noise = np.resize(noise, len(clean) + lead_in_samples)
+    _, scaled_noise = mix_at_snr(clean, noise[lead_in_samples:], snr_db)
+    noise = noise * (np.linalg.norm(scaled_noise) / (np.linalg.norm(noise[lead_in_samples:]) + 1e-10))
+
+    reference = np.concatenate((np.zeros(lead_in_samples), clean))
+    mixture = reference + noise
+
+    gain = 0.5 * 32767 / np.max(np.abs(mixture))
+    return reference * gain, (mixture * gain).astype(np.int16)
+
+
+def score(reference, processed, sample_rate, lead_in_samples):
+    reference = reference[lead_in_samples:]
+    processed = np.asarray(processed, dtype=np.float64)[lead_in_samples:]
+    return {
+        'segmental_snr_db': segmental_snr(reference, processed),
+        'log_spectral_distance_db': log_spectral_distance(reference, processed),
+        'stoi': stoi(reference, processed, sample_rate),
+    }
+
+
+def evaluate(clean, noises, snrs, sample_rate, configurations, vectorized=True):
+    lead_in = int(AudioConfig.NOISE_PROFILE_DURATION * sample_rate)
+    conditions = []
+    for (noise_name, noise), snr_db in itertools.product(noises.items(), snrs):
+        reference, mixture = build_condition(clean, noise, snr_db, lead_in)
+        conditions.append((noise_name, snr_db, reference, mixture))
+
+    results = []
+    for noise_name, snr_db, reference, mixture in conditions:
+        row = dict(configuration='unprocessed', noise=noise_name, snr_db=snr_db,
+                   cpu_seconds=0.0, rtf=0.0, **score(reference, mixture, sample_rate, lead_in))
+        results.append(row)
+        print(_format_row(row))
+
+    for configuration in configurations:
+        label = _configuration_label(configuration)
+        try:
+            with override_config(DSPConfig, **configuration), contextlib.redirect_stdout(io.StringIO()):
+                processor = AudioProcessor(enable_capture=False)
+                outputs = []
+                for noise_name, snr_db, reference, mixture in conditions:
+                    start = time.process_time()
+                    processed = processor.process_signal(mixture, sample_rate, vectorized=vectorized)
+                    outputs.append((processed, time.process_time() - start))
+        except ValueError as e:
+            print(f"Skipping {label}: {e}")
+            continue
+
+        for (noise_name, snr_db, reference, mixture), (processed, cpu_seconds) in zip(conditions, outputs):
+            row = dict(configuration=label, noise=noise_name, snr_db=snr_db,
+                       cpu_seconds=cpu_seconds, rtf=cpu_seconds / (len(mixture) / sample_rate),
+                       **configuration, **score(reference, processed, sample_rate, lead_in))
+            results.append(row)
+            print(_format_row(row))
+
+    return results
+
+
+def summarize(results):
+    """Average every metric over all conditions, per configuration."""
+    summary = {}
+    for row in results:
+        summary.setdefault(row['configuration'], []).append(row)
+
+    metrics = ('segmental_snr_db', 'log_spectral_distance_db', 'stoi', 'cpu_seconds', 'rtf')
+    return {label: {metric: float(np.mean([row[metric] for row in rows])) for metric in metrics}
+            for label, rows in summary.items()}
+
+
+def _configuration_label(configuration):
+    return (f"fft={configuration['FFT_SIZE']} hop={configuration['HOP_LENGTH']} "
+            f"os={configuration['OVERSUBTRACTION_FACTOR']:g}")
+
+
+def _format_row(row):
+    return (f"{row['configuration']:<28} {row['noise']:<6} {row['snr_db']:>5g} dB  "
+            f"segSNR {row['segmental_snr_db']:6.2f} dB  LSD {row['log_spectral_distance_db']:6.2f} dB  "
+            f"STOI {row['stoi']:.3f}  CPU {1000 * row['cpu_seconds']:7.1f} ms  RTF {row['rtf']:.4f}")
+
+
+def _float_list(value):
+    return [float(v) for v in value.split(',')]
+
+
+def _int_list(value):
+    return [int(v) for v in value.split(',')]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Evaluate enhancement quality against CPU cost")
+    parser.add_argument('--clean', help="Clean speech WAV file (default: synthetic speech)")
+    parser.add_argument('--noise', action='append',
+                        help="Noise WAV file; may be given more than once (default: white and pink noise)")
+    parser.add_argument('--rate', type=int, default=AudioConfig.RATE,
+                        help="Sample rate for synthetic speech (a --clean file keeps its own rate)")
+    parser.add_argument('--duration', type=float, default=8.0, help="Seconds of synthetic speech")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--snrs', type=_float_list, default=[0.0, 5.0, 10.0, 15.0])
+    parser.add_argument('--fft-sizes', type=_int_list, default=[DSPConfig.FFT_SIZE])
+    parser.add_argument('--hop-lengths', type=_int_list, default=[DSPConfig.HOP_LENGTH])
+    parser.add_argument('--oversubtraction', type=_float_list, default=[DSPConfig.OVERSUBTRACTION_FACTOR])
+    parser.add_argument('--streaming', action='store_true',
+                        help="Process one capture frame at a time instead of vectorized blocks")
+    parser.add_argument('-o', '--output', help="Save all rows and the per-configuration summary as JSON")
+    args = parser.parse_args(argv)
+
+    if args.clean:
+        clean, sample_rate = load_audio_from_wav(args.clean)
+        clean = clean.astype(np.float64)
+    else:
+        sample_rate = args.rate
+        clean = synthetic_speech(args.duration, sample_rate, seed=args.seed)
+
+    n_samples = len(clean) + int(AudioConfig.NOISE_PROFILE_DURATION * sample_rate)
+    if args.noise:
+        noises = {f"noise{i + 1}": load_benchmark_audio(path, sample_rate).astype(np.float64)
+                  for i, path in enumerate(args.noise)}
+    else:
+        noises = {kind: generate_noise(kind, n_samples, seed=args.seed + 1) for kind in NOISE_TYPES}
+
+    configurations = [
+        {'FFT_SIZE': fft_size, 'HOP_LENGTH': hop_length, 'OVERSUBTRACTION_FACTOR': factor}
+        for fft_size, hop_length, factor in itertools.product(args.fft_sizes, args.hop_lengths,
+                                                              args.oversubtraction)
+    ]
+
+    vectorized = BatchConfig.VECTORIZED and not args.streaming
+    results = evaluate(clean, noises, args.snrs, sample_rate, configurations, vectorized)
+
+    summary = summarize(results)
+    print("\nMean over all conditions:")
+    for label, metrics in summary.items():
+        print(f"{label:<28} segSNR {metrics['segmental_snr_db']:6.2f} dB  "
+              f"LSD {metrics['log_spectral_distance_db']:6.2f} dB  STOI {metrics['stoi']:.3f}  "
+              f"RTF {metrics['rtf']:.4f}")
+
+    if args.output:
+        report = {
+            'environment': environment_info(),
+            'settings': {'clean': args.clean or 'synthetic', 'noise': args.noise or list(NOISE_TYPES),
+                         'sample_rate': sample_rate, 'snrs_db': args.snrs, 'seed': args.seed,
+                         'vectorized': vectorized},
+            'summary': summary,
+            'results': results,
+        }
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Results saved to {args.output}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
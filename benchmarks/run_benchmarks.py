@@ -0,0 +1,307 @@
+"""Time the DSP chain over a grid of FFT sizes, chunk sizes and sample rates.
+
+Run from the project root:
+
+    python -m benchmarks.run_benchmarks                      # synthetic noisy speech
+    python -m benchmarks.run_benchmarks --input recordings/sp01_airport_sn10.wav
+    python -m benchmarks.run_benchmarks --baseline benchmarks/results/<commit>.json
+    python -m benchmarks.run_benchmarks --compare old.json new.json
+
+Each case is timed over the same deterministic input ``--repeats`` times after
+one warm-up pass, and the fastest pass is reported as microseconds per frame
+and real-time factor (processing time / audio duration; below 1 keeps up).
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime
+import numpy as np
+import scipy
+from audio_processor import AudioProcessor
+from config import AudioConfig, DSPConfig
+from dsp import SpectralSubtraction, StreamingSTFT, WienerFilter, create_noise_estimator
+from dsp.noise_estimation import expected_magnitude
+from ml import VoiceActivityDetector
+from utils.audio_utils import highpass_filter
+from .signals import load_benchmark_audio, noisy_speech
+
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+DEFAULT_FFT_SIZES = (512, 1024, 2048)
+DEFAULT_CHUNK_SIZES = (256, 512, 1024)
+DEFAULT_SAMPLE_RATES = (8000, 16000, 48000)
+
+
+@contextlib.contextmanager
+def override_config(config_class, **values):
+    """Temporarily change class attributes of a config class, which components read at construction."""
+    saved = {name: getattr(config_class, name) for name in values}
+    for name, value in values.items():
+        setattr(config_class, name, value)
+    try:
+        yield
+    finally:
+        for name, value in saved.items():
+            setattr(config_class, name, value)
+
+
+@contextlib.contextmanager
+def config_overrides(fft_size, chunk_size, sample_rate):
+    with override_config(DSPConfig, FFT_SIZE=fft_size, HOP_LENGTH=fft_size // 4), \
+            override_config(AudioConfig, CHUNK_SIZE=chunk_size, RATE=sample_rate):
+        yield
+
+
+def _calibrated_noise(noise_frames, sample_rate):
+    stft = StreamingSTFT()
+    noise_estimator = create_noise_estimator(sample_rate / stft.hop_length)
+    noise_estimator.initialize(np.abs(stft.analyze_signal(np.concatenate(noise_frames))) ** 2)
+    return stft, noise_estimator
+
+
+def _setup_spectral_subtraction(noise_frames, sample_rate):
+    stft, noise_estimator = _calibrated_noise(noise_frames, sample_rate)
+    spectral_subtraction = SpectralSubtraction()
+
+    def process(audio_frame):
+        spectra = stft.analyze(audio_frame)
+        magnitude = np.abs(spectra)
+        noise_magnitude = expected_magnitude(noise_estimator.hold(magnitude))
+        return stft.synthesize(spectra * spectral_subtraction.gain_from_noise(magnitude, noise_magnitude))
+    return process
+
+
+def _setup_wiener_filter(noise_frames, sample_rate):
+    stft, noise_estimator = _calibrated_noise(noise_frames, sample_rate)
+    wiener_filter = WienerFilter()
+
+    def process(audio_frame):
+        spectra = stft.analyze(audio_frame)
+        power = np.abs(spectra) ** 2
+        return stft.synthesize(spectra * wiener_filter.gain_from_noise(power, noise_estimator.hold(power)))
+    return process
+
+
+def _setup_noise_estimator(noise_frames, sample_rate):
+    stft, noise_estimator = _calibrated_noise(noise_frames, sample_rate)
+    return lambda audio_frame: noise_estimator.update(np.abs(stft.analyze(audio_frame)) ** 2)
+
+
+def _setup_vad(noise_frames, sample_rate):
+    vad = VoiceActivityDetector(sample_rate)
+    vad.calibrate_noise_floor(noise_frames)
+    return vad.detect
+
+
+def _setup_highpass_filter(noise_frames, sample_rate):
+    return lambda audio_frame: highpass_filter(audio_frame, sample_rate)
+
+
+def _setup_process_frame(noise_frames, sample_rate):
+    processor = AudioProcessor(enable_capture=False)
+    processor._reset_chain(sample_rate)
+    processor.calibrate_from_frames(noise_frames)
+    return processor._process_frame
+
+
+# name -> (setup, grid parameters the case depends on)
+CASES = {
+    'spectral_subtraction': (_setup_spectral_subtraction, ('fft_size', 'chunk_size', 'sample_rate')),
+    'wiener_filter': (_setup_wiener_filter, ('fft_size', 'chunk_size', 'sample_rate')),
+    'noise_estimator': (_setup_noise_estimator, ('fft_size', 'chunk_size', 'sample_rate')),
+    'vad': (_setup_vad, ('chunk_size', 'sample_rate')),
+    'highpass_filter': (_setup_highpass_filter, ('chunk_size', 'sample_rate')),
+    'process_frame': (_setup_process_frame, ('fft_size', 'chunk_size', 'sample_rate')),
+}
+
+
+def time_case(process, frames, repeats):
+    """Return per-pass wall times in seconds, after one untimed warm-up pass."""
+    for frame in frames:
+        process(frame)
+
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter_ns()
+        for frame in frames:
+            process(frame)
+        timings.append((time.perf_counter_ns() - start) / 1e9)
+    return timings
+
+
+def run_benchmarks(cases, fft_sizes, chunk_sizes, sample_rates, input_path=None,
+                   duration_seconds=10.0, repeats=5, seed=0):
+    results = []
+    seen = set()
+
+    for sample_rate in sample_rates:
+        if input_path:
+            audio = load_benchmark_audio(input_path, sample_rate, duration_seconds)
+        else:
+            audio = noisy_speech(duration_seconds, sample_rate, seed=seed)
+        noise = audio[:int(AudioConfig.NOISE_PROFILE_DURATION * sample_rate)]
+
+        for chunk_size in chunk_sizes:
+            frames = [audio[i:i + chunk_size] for i in range(0, len(audio) - chunk_size + 1, chunk_size)]
+            noise_frames = [noise[i:i + chunk_size] for i in range(0, len(noise), chunk_size)]
+
+            for fft_size in fft_sizes:
+                for name in cases:
+                    setup, parameters = CASES[name]
+                    params = {'fft_size': fft_size, 'chunk_size': chunk_size, 'sample_rate': sample_rate}
+                    params = {key: (value if key in parameters else None) for key, value in params.items()}
+
+                    key = _result_key(name, params)
+                    if key in seen:
+                        continue
+                    seen.add(key)
+
+                    with config_overrides(fft_size, chunk_size, sample_rate), \
+                            contextlib.redirect_stdout(io.StringIO()):
+                        process = setup(noise_frames, sample_rate)
+                        timings = time_case(process, frames, repeats)
+
+                    best = min(timings)
+                    result = dict(case=name, **params,
+                                  frames=len(frames),
+                                  us_per_frame=1e6 * best / len(frames),
+                                  median_us_per_frame=1e6 * float(np.median(timings)) / len(frames),
+                                  rtf=best / (len(frames) * chunk_size / sample_rate))
+                    results.append(result)
+                    print(_format_result(result))
+
+    return results
+
+
+def _result_key(name, params):
+    return (name, params['fft_size'], params['chunk_size'], params['sample_rate'])
+
+
+def _format_result(result):
+    fft = result['fft_size'] if result['fft_size'] is not None else '-'
+    return (f"{result['case']:<22} fft={fft!s:<5} chunk={result['chunk_size']:<5} "
+            f"rate={result['sample_rate']:<6} {result['us_per_frame']:>10.1f} us/frame  "
+            f"RTF {result['rtf']:.4f}")
+
+
+def _git_commit():
+    try:
+        output = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)), timeout=10)
+        return output.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def environment_info():
+    return {
+        'commit': _git_commit(),
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'scipy': scipy.__version__,
+        'platform': platform.platform(),
+        'processor': platform.processor(),
+        'cpu_count': os.cpu_count(),
+    }
+
+
+def save_results(path, results, settings):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    report = {'environment': environment_info(), 'settings': settings, 'results': results}
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Results saved to {path}")
+
+
+def load_results(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def compare_results(baseline, current, threshold_percent=10.0):
+    """Print per-case changes in us/frame and return the number of regressions."""
+    baseline_results = {_result_key(r['case'], r): r for r in baseline['results']}
+    regressions = 0
+
+    print(f"\nComparing against {baseline['environment'].get('commit')} "
+          f"({baseline['environment'].get('timestamp')})")
+    for result in current['results']:
+        previous = baseline_results.get(_result_key(result['case'], result))
+        if previous is None:
+            continue
+
+        change = 100.0 * (result['us_per_frame'] / previous['us_per_frame'] - 1.0)
+        flag = ""
+        if change > threshold_percent:
+            flag = "  REGRESSION"
+            regressions += 1
+        elif change < -threshold_percent:
+            flag = "  faster"
+        print(f"{_format_result(result)}  {change:+7.1f}%{flag}")
+
+    print(f"{regressions} regression(s) above {threshold_percent:.0f}%")
+    return regressions
+
+
+def _int_list(value):
+    return [int(v) for v in value.split(',')]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the speech enhancement DSP chain")
+    parser.add_argument('--input', help="WAV file to benchmark on (default: synthetic noisy speech)")
+    parser.add_argument('--cases', default=','.join(CASES),
+                        help=f"Comma-separated cases to run (default: all of {', '.join(CASES)})")
+    parser.add_argument('--fft-sizes', type=_int_list, default=list(DEFAULT_FFT_SIZES))
+    parser.add_argument('--chunk-sizes', type=_int_list, default=list(DEFAULT_CHUNK_SIZES))
+    parser.add_argument('--rates', type=_int_list, default=list(DEFAULT_SAMPLE_RATES))
+    parser.add_argument('--duration', type=float, default=10.0, help="Seconds of audio per case")
+    parser.add_argument('--repeats', type=int, default=5, help="Timed passes per case; the fastest is kept")
+    parser.add_argument('--seed', type=int, default=0, help="Seed for the synthetic input")
+    parser.add_argument('-o', '--output', help="JSON file to save results to "
+                                               "(default: benchmarks/results/<commit>.json)")
+    parser.add_argument('--baseline', help="Compare this run against an earlier results file")
+    parser.add_argument('--compare', nargs=2, metavar=('BASELINE', 'CURRENT'),
+                        help="Compare two saved results files without running anything")
+    parser.add_argument('--threshold', type=float, default=10.0,
+                        help="Slowdown in percent that counts as a regression (default: 10)")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        regressions = compare_results(load_results(args.compare[0]), load_results(args.compare[1]),
+                                      args.threshold)
+        return 1 if regressions else 0
+
+    cases = [name.strip() for name in args.cases.split(',') if name.strip()]
+    unknown = [name for name in cases if name not in CASES]
+    if unknown:
+        parser.error(f"Unknown case(s): {', '.join(unknown)}")
+
+    settings = {
+        'input': args.input or 'synthetic',
+        'duration_seconds': args.duration,
+        'repeats': args.repeats,
+        'seed': args.seed,
+    }
+    results = run_benchmarks(cases, args.fft_sizes, args.chunk_sizes, args.rates, args.input,
+                             args.duration, args.repeats, args.seed)
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{_git_commit() or 'results'}.json")
+    save_results(output, results, settings)
+
+    if args.baseline:
+        regressions = compare_results(load_results(args.baseline), {'results': results}, args.threshold)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,59 @@
+import numpy as np
+from scipy import signal
+from utils.audio_utils import load_audio_from_wav
+
+
+def synthetic_speech(duration_seconds, sample_rate, seed=0):
+    """Voiced-speech-like test signal: a gliding harmonic series gated into syllables.
+
+    Deterministic for a given seed, so runs on different machines time the same input.
+    """
+    rng = np.random.default_rng(seed)
+    n_samples = int(duration_seconds * sample_rate)
+    t = np.arange(n_samples) / sample_rate
+
+    # Pitch wanders between about 100 and 200 Hz
+    pitch = 150 + 50 * np.sin(2 * np.pi * 0.3 * t + rng.uniform(0, 2 * np.pi))
+    phase = 2 * np.pi * np.cumsum(pitch) / sample_rate
+
+    speech = np.zeros(n_samples)
+    for harmonic in range(1, 20):
+        # Skip harmonics above Nyquist at low sample rates
+        audible = harmonic * pitch < sample_rate / 2
+        speech += audible * np.sin(harmonic * phase) / harmonic
+
+    # Roughly 4 syllables per second with pauses between words
+    syllables = np.maximum(np.sin(2 * np.pi * 2.0 * t), 0) ** 2
+    words = (np.sin(2 * np.pi * 0.25 * t) > -0.3).astype(float)
+    speech *= syllables * words
+
+    return speech / np.max(np.abs(speech))
+
+
+def noisy_speech(duration_seconds, sample_rate, snr_db=10.0, seed=0):
+    """Synthetic speech in white noise at ``snr_db``, as int16."""
+    rng = np.random.default_rng(seed)
+    speech = synthetic_speech(duration_seconds, sample_rate, seed)
+    noise = rng.standard_normal(len(speech))
+
+    noise *= np.sqrt(np.mean(speech ** 2) / np.mean(noise ** 2) / 10 ** (snr_db / 10))
+    mixture = speech + noise
+    mixture *= 0.5 * 32767 / np.max(np.abs(mixture))
+
+    return mixture.astype(np.int16)
+
+
+def load_benchmark_audio(path, sample_rate, duration_seconds=None):
+    """Load a WAV file as int16 at ``sample_rate``, looped or cut to ``duration_seconds``."""
+    audio, file_rate = load_audio_from_wav(path)
+
+    if file_rate != sample_rate:
+        divisor = np.gcd(sample_rate, file_rate)
+        audio = signal.resample_poly(audio.astype(np.float64), sample_rate // divisor, file_rate // divisor)
+        audio = np.clip(audio, -32768, 32767).astype(np.int16)
+
+    if duration_seconds is not None:
+        n_samples = int(duration_seconds * sample_rate)
+        audio = np.resize(audio, n_samples)
+
+    return audio
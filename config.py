@@ -1,3 +1,6 @@
+import json
+
+
 class AudioConfig:
     CHUNK_SIZE = 1024
     FORMAT = 'int16'
@@ -7,26 +10,64 @@ class AudioConfig:
 
     NOISE_PROFILE_DURATION = 2.0
 
+    # Capture ring buffer capacity, in CHUNK_SIZE frames
     BUFFER_SIZE = 4
+    # Samples the processing thread reads per block (None = CHUNK_SIZE); any
+    # multiple of DSPConfig.HOP_LENGTH keeps the STFT hop independent of the device
+    PROCESS_BLOCK_SIZE = None
+    # Play the enhanced audio on the output device; off to avoid speaker-to-microphone feedback
+    PLAYBACK = False
 
 
 class DSPConfig:
     FFT_SIZE = 2048
     HOP_LENGTH = 512
     WINDOW_TYPE = 'hann'
+    # Compute both filter gains from the same noisy spectrum and apply them as
+    # one mask. When False, the Wiener filter runs on the subtraction output.
+    FUSED_PIPELINE = True
 
     SPECTRAL_FLOOR = 0.002
     NOISE_ALPHA = 0.98
     OVERSUBTRACTION_FACTOR = 2.0
 
-    WIENER_ALPHA = 0.99
     WIENER_MIN_GAIN = 0.1
+    # 'power_subtraction' uses the instantaneous SNR; 'wiener', 'mmse_stsa' and
+    # 'log_mmse' use the decision-directed a-priori SNR, with less musical noise
+    WIENER_GAIN_RULE = 'power_subtraction'
+    # Weight of the previous frame's clean estimate in the a-priori SNR
+    DD_ALPHA = 0.98
+    DD_MIN_SNR_DB = -25
+    # Look 'mmse_stsa' / 'log_mmse' gains up in an interpolated table instead of
+    # evaluating the Bessel and exponential integral terms per bin
+    WIENER_GAIN_TABLE = True
+    # Built tables are cached here (None = rebuild in every process)
+    GAIN_TABLE_CACHE_DIR = "cache"
+
+    # Noise tracking shared by both filters: 'vad' averages the frames the VAD
+    # marks as noise (with NOISE_ALPHA); 'minimum_statistics' and 'mcra' update
+    # on every frame and keep adapting during continuous speech or babble
+    NOISE_ESTIMATOR = 'mcra'
+    # Span of the minimum search; must outlast the longest speech burst
+    NOISE_WINDOW_SECONDS = 1.5
+    MIN_STATS_SUBWINDOWS = 8
+    MIN_STATS_SMOOTHING = 0.85
+    # Compensates the minimum lying below the mean noise power
+    MIN_STATS_BIAS = 1.5
+    MCRA_ALPHA = 0.95
+    # Smoothed power above THRESHOLD times its minimum counts as speech
+    MCRA_THRESHOLD = 5.0
 
     VAD_THRESHOLD = 0.03
     VAD_SMOOTHING = 5
     # Lower default threshold to detect speech reliably on typical mic levels
     # (previous value was too high for normalized int16 energy values)
     VAD_DEFAULT_THRESHOLD = 1e-05
+    # Model from `main.py train-vad`; when set it replaces the threshold rules
+    VAD_MODEL_PATH = None
+    VAD_MODEL_THRESHOLD = 0.5
+    # Frames per step of detect_batch/probability_batch on long recordings
+    VAD_BATCH_FRAMES = 2048
 
 
 class RecordingConfig:
@@ -43,6 +84,43 @@ class RecordingConfig:
     RECORD_POST_FRAMES = 5
     # High-pass filter cutoff (Hz) to remove low-frequency thumps
     RECORD_HP_CUTOFF_HZ = 120
+    # Click suppression: samples further than THRESHOLD from the median of
+    # WINDOW neighbouring samples are replaced by that median
+    RECORD_SPIKE_WINDOW = 5
+    RECORD_SPIKE_THRESHOLD = 3000
+    # Recordings are written incrementally; start a new file once either
+    # limit is reached (0 = unlimited)
+    RECORD_MAX_FILE_SECONDS = 0
+    RECORD_MAX_FILE_BYTES = 0
+    # Force written audio to disk at least this often
+    RECORD_FLUSH_SECONDS = 2.0
+    # Frames the writer thread may fall behind before frames are dropped
+    RECORD_QUEUE_FRAMES = 256
+    # Sidecar index of the speech segments of each speech-only recording,
+    # 'json' or 'csv' (None = no index)
+    RECORD_SEGMENT_INDEX = 'json'
+
+
+class BatchConfig:
+    # Worker processes for offline enhancement (0 = one per CPU core)
+    WORKERS = 0
+    # Long files are split into chunks of this length for the process pool
+    CHUNK_SECONDS = 60.0
+    # Audio processed before each chunk so the adaptive noise state can converge
+    WARMUP_SECONDS = 10.0
+    # Transform whole blocks of capture frames at once instead of one frame at a time
+    VECTORIZED = True
+    # Capture frames per vectorized block (bounds memory for long files)
+    VECTOR_BLOCK_FRAMES = 256
+    # Seconds of input read from the memory-mapped file per step of sequential enhancement
+    READ_BLOCK_SECONDS = 10.0
+
+
+class ProfilingConfig:
+    # Histogram resolution for per-stage latency statistics
+    LATENCY_BUCKETS_PER_DECADE = 10
+    # Append every frame's stage timings to this JSON lines file (None = off)
+    LATENCY_JSONL_PATH = None
 
 
 class GUIConfig:
@@ -50,6 +128,43 @@ class GUIConfig:
     WINDOW_WIDTH = 950
     WINDOW_HEIGHT = 750
 
+    # Stats polling and plot refresh run on separate timers (ms)
     UPDATE_INTERVAL = 100
+    PLOT_INTERVAL = 200
 
     PLOT_HISTORY = 100
+
+    # Spectrogram panel: columns shown, display bins per spectrum, STFT frames
+    # per column and colour range below the loudest bin
+    SPECTROGRAM_HISTORY = 200
+    SPECTROGRAM_BINS = 128
+    SPECTROGRAM_DECIMATION = 2
+    SPECTROGRAM_RANGE_DB = 80
+
+
+_CONFIG_CLASSES = {cls.__name__: cls for cls in (AudioConfig, DSPConfig, RecordingConfig, BatchConfig,
+                                                 ProfilingConfig, GUIConfig)}
+
+
+def apply_overrides(overrides):
+    """Set config class attributes from a mapping like ``{'DSPConfig': {'FFT_SIZE': 1024}}``.
+
+    Components read these attributes when they are constructed, so overrides
+    must be applied before the AudioProcessor is created. Only settings that
+    already exist can be overridden.
+    """
+    for class_name, values in overrides.items():
+        config_class = _CONFIG_CLASSES.get(class_name)
+        if config_class is None:
+            raise ValueError(f"Unknown config section '{class_name}'")
+
+        for name, value in values.items():
+            if not hasattr(config_class, name):
+                raise ValueError(f"Unknown setting '{class_name}.{name}'")
+            setattr(config_class, name, value)
+
+
+def load_config_file(path):
+    """Apply overrides from a JSON file with one object per config class."""
+    with open(path) as f:
+        apply_overrides(json.load(f))
@@ -1,4 +1,9 @@
+from .stft import StreamingSTFT
 from .spectral_subtraction import SpectralSubtraction
 from .wiener_filter import WienerFilter
+from .gain_table import GainTable, get_gain_table
+from .noise_estimation import (NoiseEstimator, VADNoiseEstimator, MinimumStatisticsEstimator,
+                               MCRAEstimator, create_noise_estimator)
 
-__all__ = ['SpectralSubtraction', 'WienerFilter']
+__all__ = ['StreamingSTFT', 'SpectralSubtraction', 'WienerFilter', 'NoiseEstimator', 'VADNoiseEstimator',
+           'MinimumStatisticsEstimator', 'MCRAEstimator', 'create_noise_estimator', 'GainTable', 'get_gain_table']
@@ -0,0 +1,32 @@
+import numpy as np
+from scipy import special
+
+
+def wiener_gain(a_priori_snr, a_posteriori_snr):
+    """Wiener gain xi / (1 + xi) for a-priori SNR ``xi``."""
+    return a_priori_snr / (1.0 + a_priori_snr)
+
+
+def mmse_stsa_gain(a_priori_snr, a_posteriori_snr):
+    """MMSE short-time spectral amplitude gain (Ephraim and Malah, 1984).
+
+    The ``exp(-v / 2)`` factor is folded into the exponentially scaled Bessel
+    functions, so the gain stays finite for large SNRs.
+    """
+    gamma = np.maximum(a_posteriori_snr, 1e-10)
+    v = np.maximum(a_priori_snr / (1.0 + a_priori_snr) * gamma, 1e-10)
+    return (np.sqrt(np.pi * v) / (2.0 * gamma)
+            * ((1.0 + v) * special.i0e(0.5 * v) + v * special.i1e(0.5 * v)))
+
+
+def log_mmse_gain(a_priori_snr, a_posteriori_snr):
+    """MMSE log-spectral amplitude gain (Ephraim and Malah, 1985)."""
+    v = np.maximum(a_priori_snr / (1.0 + a_priori_snr) * a_posteriori_snr, 1e-10)
+    return a_priori_snr / (1.0 + a_priori_snr) * np.exp(0.5 * special.exp1(v))
+
+
+GAIN_RULES = {
+    'wiener': wiener_gain,
+    'mmse_stsa': mmse_stsa_gain,
+    'log_mmse': log_mmse_gain,
+}
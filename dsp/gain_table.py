@@ -0,0 +1,143 @@
+import hashlib
+import json
+import os
+import numpy as np
+from .gain_rules import GAIN_RULES
+
+
+# Bump whenever a gain rule or the table layout changes, so stale caches are rebuilt
+GAIN_TABLE_VERSION = 1
+
+_tables = {}
+
+
+class GainTable:
+    """A gain rule tabulated over a grid of a-priori and a-posteriori SNRs in dB.
+
+    Gains are interpolated bilinearly between the four surrounding grid
+    points, which are fetched for a whole frame with one ``np.take`` on the
+    flattened table. SNRs outside the grid are clamped to its edges. The
+    table is built on first use and cached in ``cache_dir`` under a key that
+    covers the rule, the grid and GAIN_TABLE_VERSION.
+    """
+
+    def __init__(self, rule, a_priori_range_db=(-30.0, 40.0), a_posteriori_range_db=(-30.0, 50.0),
+                 step_db=0.25, cache_dir=None, tolerance=0.01):
+        if rule not in GAIN_RULES:
+            raise ValueError(f"Unknown gain rule '{rule}', expected one of {', '.join(GAIN_RULES)}")
+        self.rule = rule
+        self.a_priori_range_db = tuple(float(x) for x in a_priori_range_db)
+        self.a_posteriori_range_db = tuple(float(x) for x in a_posteriori_range_db)
+        self.step_db = float(step_db)
+        self.cache_dir = cache_dir
+        self.tolerance = tolerance
+
+        self.n_a_priori = int(round((self.a_priori_range_db[1] - self.a_priori_range_db[0]) / self.step_db)) + 1
+        self.n_a_posteriori = int(round((self.a_posteriori_range_db[1] - self.a_posteriori_range_db[0])
+                                        / self.step_db)) + 1
+        self._table = None
+
+    @property
+    def key(self):
+        settings = json.dumps([GAIN_TABLE_VERSION, self.rule, self.a_priori_range_db,
+                               self.a_posteriori_range_db, self.step_db])
+        return f"gain_table_v{GAIN_TABLE_VERSION}_{self.rule}_{hashlib.sha1(settings.encode()).hexdigest()[:12]}"
+
+    @property
+    def cache_path(self):
+        if self.cache_dir is None:
+            return None
+        return os.path.join(self.cache_dir, self.key + ".npy")
+
+    @property
+    def table(self):
+        if self._table is None:
+            self._table = self._load() if self.cache_path else None
+            if self._table is None:
+                self._table = self._build()
+                self._save()
+        return self._table
+
+    def _grid(self):
+        a_priori_db = self.a_priori_range_db[0] + self.step_db * np.arange(self.n_a_priori)
+        a_posteriori_db = self.a_posteriori_range_db[0] + self.step_db * np.arange(self.n_a_posteriori)
+        return 10 ** (a_priori_db / 10), 10 ** (a_posteriori_db / 10)
+
+    def exact(self, a_priori_snr, a_posteriori_snr):
+        # Applied gains never exceed 1, so neither do the tabulated ones
+        return np.minimum(GAIN_RULES[self.rule](a_priori_snr, a_posteriori_snr), 1.0)
+
+    def _build(self):
+        a_priori_snr, a_posteriori_snr = self._grid()
+        table = self.exact(a_priori_snr[:, np.newaxis], a_posteriori_snr[np.newaxis, :])
+        table = np.broadcast_to(table, (self.n_a_priori, self.n_a_posteriori)).astype(np.float32).ravel()
+
+        error = self.check_accuracy(table)
+        if error > self.tolerance:
+            raise ValueError(f"Gain table for '{self.rule}' deviates by {error:.4f} from the exact rule; "
+                             f"use a smaller step than {self.step_db} dB")
+        return table
+
+    def _load(self):
+        try:
+            table = np.load(self.cache_path, allow_pickle=False)
+        except (OSError, ValueError):
+            return None
+        if table.shape != (self.n_a_priori * self.n_a_posteriori,) or self.check_accuracy(table) > self.tolerance:
+            print(f"Ignoring invalid gain table cache {self.cache_path}")
+            return None
+        return table
+
+    def _save(self):
+        if self.cache_path is None:
+            return
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            # Write then rename, so a concurrent reader never sees a partial file
+            temporary_path = f"{self.cache_path}.{os.getpid()}.tmp"
+            with open(temporary_path, 'wb') as f:
+                np.save(f, self._table)
+            os.replace(temporary_path, self.cache_path)
+        except OSError as e:
+            print(f"Could not cache gain table: {e}")
+
+    def _interpolate(self, table, a_priori_snr, a_posteriori_snr):
+        # Fractional grid positions, clamped so the upper neighbour stays on the grid
+        row = (10 * np.log10(np.maximum(a_priori_snr, 1e-30)) - self.a_priori_range_db[0]) / self.step_db
+        column = (10 * np.log10(np.maximum(a_posteriori_snr, 1e-30)) - self.a_posteriori_range_db[0]) / self.step_db
+        row = np.clip(row, 0, self.n_a_priori - 1 - 1e-9)
+        column = np.clip(column, 0, self.n_a_posteriori - 1 - 1e-9)
+        row_index = row.astype(np.intp)
+        column_index = column.astype(np.intp)
+        row_fraction = row - row_index
+        column_fraction = column - column_index
+
+        corner = row_index * self.n_a_posteriori + column_index
+        low_low, low_high, high_low, high_high = np.take(
+            table, np.stack((corner, corner + 1, corner + self.n_a_posteriori, corner + self.n_a_posteriori + 1)))
+
+        low = low_low + column_fraction * (low_high - low_low)
+        high = high_low + column_fraction * (high_high - high_low)
+        return low + row_fraction * (high - low)
+
+    def lookup(self, a_priori_snr, a_posteriori_snr):
+        """Return the interpolated gain for each pair of SNRs, with the shape of the inputs."""
+        return self._interpolate(self.table, a_priori_snr, a_posteriori_snr)
+
+    def check_accuracy(self, table=None, n_points=20000, seed=0):
+        """Return the largest absolute gain error against the exact rule at random in-grid SNRs."""
+        table = self.table if table is None else table
+        rng = np.random.default_rng(seed)
+        a_priori_snr = 10 ** (rng.uniform(*self.a_priori_range_db, n_points) / 10)
+        a_posteriori_snr = 10 ** (rng.uniform(*self.a_posteriori_range_db, n_points) / 10)
+
+        tabulated = self._interpolate(table, a_priori_snr, a_posteriori_snr)
+        return float(np.max(np.abs(tabulated - self.exact(a_priori_snr, a_posteriori_snr))))
+
+
+def get_gain_table(rule, cache_dir=None, step_db=0.25):
+    """Return the shared GainTable for ``rule``; each process builds or loads it once."""
+    key = (rule, cache_dir, step_db)
+    if key not in _tables:
+        _tables[key] = GainTable(rule, step_db=step_db, cache_dir=cache_dir)
+    return _tables[key]
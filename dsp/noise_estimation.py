@@ -0,0 +1,250 @@
+from abc import ABC, abstractmethod
+import numpy as np
+from scipy import signal
+from config import DSPConfig
+
+
+def recursive_average(estimate, frames, update_mask, alpha):
+    """Gated first-order recursive average over spectral frames.
+
+    Computes ``x[t] = alpha * x[t-1] + (1 - alpha) * frames[t]`` for every frame
+    where ``update_mask`` is True and ``x[t] = x[t-1]`` elsewhere, starting from
+    ``estimate``. ``frames`` has shape (n_frames, n_bins), or (n_channels,
+    n_frames, n_bins) with one estimate per channel; ``update_mask`` is a
+    single bool or broadcasts to ``frames.shape[:-1]``. Returns the estimate
+    in effect at each frame, with the shape of ``frames``.
+
+    The updating frames form a plain IIR filter, so they are run through one
+    ``lfilter`` call along the time axis and the result is held across the
+    frames that do not update. Channels share that call when they update on
+    the same frames.
+    """
+    n_frames = frames.shape[-2]
+    update_mask = np.broadcast_to(np.asarray(update_mask, dtype=bool), frames.shape[:-1])
+    estimate = np.broadcast_to(estimate, frames.shape[:-2] + frames.shape[-1:])
+
+    if n_frames == 0:
+        return np.broadcast_to(estimate[..., np.newaxis, :], frames.shape)
+
+    channel_masks = update_mask.reshape(-1, n_frames)
+    if len(channel_masks) > 1 and not np.all(channel_masks == channel_masks[0]):
+        return np.stack([recursive_average(estimate[c], frames[c], update_mask[c], alpha)
+                         for c in range(len(frames))])
+
+    update_mask = channel_masks[0] if len(channel_masks) > 0 else np.zeros(n_frames, dtype=bool)
+    update_positions = np.cumsum(update_mask) - 1
+
+    if update_positions[-1] < 0:
+        return np.broadcast_to(estimate[..., np.newaxis, :], frames.shape)
+
+    initial_state = (alpha * estimate)[..., np.newaxis, :]
+    updated, _ = signal.lfilter([1 - alpha], [1, -alpha], frames[..., update_mask, :],
+                                axis=-2, zi=initial_state)
+
+    trajectory = updated[..., np.maximum(update_positions, 0), :]
+    trajectory[..., update_positions < 0, :] = estimate[..., np.newaxis, :]
+    return trajectory
+
+
+def expected_magnitude(noise_power):
+    """Mean STFT magnitude of Gaussian noise with the given power, sqrt(pi / 4 * power)."""
+    return np.sqrt(0.25 * np.pi * noise_power)
+
+
+class NoiseEstimator(ABC):
+    """Per-bin noise power tracked from power spectra shared by both filters.
+
+    Frames have shape (n_frames, n_bins) or (n_channels, n_frames, n_bins);
+    the estimate has the same shape without the frame axis. ``update``
+    returns the estimate in effect at each frame, so the gains of a whole
+    block can be computed at once.
+    """
+
+    def __init__(self):
+        self.noise_power = None
+
+    def initialize(self, power):
+        """Start from the mean of noise-only power frames, e.g. from calibration."""
+        self.noise_power = np.mean(power, axis=-2)
+
+    def reset(self):
+        self.noise_power = None
+
+    def hold(self, power):
+        """Return the current estimate for every frame without updating it."""
+        if self.noise_power is None:
+            return None
+        return np.broadcast_to(self.noise_power[..., np.newaxis, :], power.shape)
+
+    @abstractmethod
+    def update(self, power, speech_mask=False):
+        """Track ``power`` frames and return the estimate in effect at each one.
+
+        ``speech_mask`` marks the frames the VAD holds to be speech, as a bool
+        or an array broadcasting to ``power.shape[:-1]``. Estimators that need
+        calibration return None until ``initialize`` is called.
+        """
+
+
+class VADNoiseEstimator(NoiseEstimator):
+    """Recursive average over the frames the VAD marks as noise."""
+
+    def __init__(self, alpha):
+        super().__init__()
+        self.alpha = alpha
+
+    def update(self, power, speech_mask=False):
+        if self.noise_power is None:
+            return None
+
+        trajectory = recursive_average(self.noise_power, power, ~np.asarray(speech_mask, dtype=bool),
+                                       self.alpha)
+        if trajectory.shape[-2] > 0:
+            self.noise_power = trajectory[..., -1, :].copy()
+        return trajectory
+
+
+class MinimumStatisticsEstimator(NoiseEstimator):
+    """Minimum statistics noise tracking (Martin, 2001), independent of the VAD.
+
+    The noise power is the bias-compensated minimum of the smoothed power
+    over the last ``window_frames`` frames. The window is split into
+    ``subwindows`` parts whose minima are kept in a ring, so each frame costs
+    O(n_bins) instead of a search over the whole window.
+    """
+
+    def __init__(self, window_frames, subwindows=8, smoothing=0.85, bias=1.5):
+        super().__init__()
+        self.subwindow_frames = max(1, int(round(window_frames / subwindows)))
+        self.subwindows = int(subwindows)
+        self.smoothing = smoothing
+        self.bias = bias
+        self.reset()
+
+    def reset(self):
+        super().reset()
+        self._smoothed = None
+
+    def initialize(self, power):
+        super().initialize(power)
+        self._start(self.noise_power, self.noise_power / self.bias)
+
+    def _start(self, smoothed, minimum):
+        self._smoothed = np.array(smoothed, dtype=np.float64)
+        self._minima = np.repeat(minimum[np.newaxis], self.subwindows, axis=0)
+        self._window_min = np.array(minimum, dtype=np.float64)
+        self._current_min = np.full_like(self._smoothed, np.inf)
+        self._slot = 0
+        self._count = 0
+
+    def update(self, power, speech_mask=False):
+        if self._smoothed is None and power.shape[-2] > 0:
+            first = power[..., 0, :]
+            self._start(first, first)
+
+        trajectory = np.empty(power.shape)
+        for t in range(power.shape[-2]):
+            self._smoothed *= self.smoothing
+            self._smoothed += (1.0 - self.smoothing) * power[..., t, :]
+            np.minimum(self._current_min, self._smoothed, out=self._current_min)
+
+            self._count += 1
+            if self._count == self.subwindow_frames:
+                # Retire the oldest subwindow; the window minimum only changes here
+                self._minima[self._slot] = self._current_min
+                self._slot = (self._slot + 1) % self.subwindows
+                self._window_min = self._minima.min(axis=0)
+                self._current_min.fill(np.inf)
+                self._count = 0
+
+            trajectory[..., t, :] = self.bias * np.minimum(self._window_min, self._current_min)
+
+        if power.shape[-2] > 0:
+            self.noise_power = trajectory[..., -1, :].copy()
+        return trajectory
+
+
+class MCRAEstimator(NoiseEstimator):
+    """Minima-controlled recursive averaging (Cohen and Berdugo, 2002).
+
+    Every frame updates the noise with a smoothing factor that rises towards
+    1 with the estimated speech presence probability. Speech presence is the
+    ratio of the smoothed power to its running minimum, which is restarted
+    every ``window_frames`` frames, so tracking costs O(n_bins) per frame.
+    """
+
+    def __init__(self, window_frames, smoothing=0.8, alpha=0.95, presence_alpha=0.2, threshold=5.0):
+        super().__init__()
+        self.window_frames = max(1, int(window_frames))
+        self.smoothing = smoothing
+        self.alpha = alpha
+        self.presence_alpha = presence_alpha
+        self.threshold = threshold
+        self.reset()
+
+    def reset(self):
+        super().reset()
+        self._smoothed = None
+
+    def initialize(self, power):
+        super().initialize(power)
+        self._start(self.noise_power)
+
+    def _start(self, noise_power):
+        self.noise_power = np.array(noise_power, dtype=np.float64)
+        self._smoothed = self._smooth_bins(self.noise_power)
+        self._minimum = self._smoothed.copy()
+        self._candidate = self._smoothed.copy()
+        self._presence = np.zeros_like(self._smoothed)
+        self._count = 0
+
+    @staticmethod
+    def _smooth_bins(power):
+        # Three-tap Hann smoothing across frequency
+        padded = np.concatenate((power[..., :1], power, power[..., -1:]), axis=-1)
+        return 0.25 * padded[..., :-2] + 0.5 * padded[..., 1:-1] + 0.25 * padded[..., 2:]
+
+    def update(self, power, speech_mask=False):
+        if self._smoothed is None and power.shape[-2] > 0:
+            self._start(power[..., 0, :])
+
+        trajectory = np.empty(power.shape)
+        for t in range(power.shape[-2]):
+            frame = power[..., t, :]
+            self._smoothed = self.smoothing * self._smoothed + (1.0 - self.smoothing) * self._smooth_bins(frame)
+
+            self._count += 1
+            if self._count == self.window_frames:
+                self._minimum = np.minimum(self._candidate, self._smoothed)
+                self._candidate = self._smoothed.copy()
+                self._count = 0
+            else:
+                np.minimum(self._minimum, self._smoothed, out=self._minimum)
+                np.minimum(self._candidate, self._smoothed, out=self._candidate)
+
+            speech = self._smoothed > self.threshold * self._minimum
+            self._presence = self.presence_alpha * self._presence + (1.0 - self.presence_alpha) * speech
+            alpha = self.alpha + (1.0 - self.alpha) * self._presence
+            self.noise_power = alpha * self.noise_power + (1.0 - alpha) * frame
+            trajectory[..., t, :] = self.noise_power
+
+        return trajectory
+
+
+NOISE_ESTIMATORS = ('vad', 'minimum_statistics', 'mcra')
+
+
+def create_noise_estimator(frame_rate, name=None):
+    """Build the DSPConfig.NOISE_ESTIMATOR tracker for STFT frames arriving at ``frame_rate`` per second."""
+    config = DSPConfig()
+    name = name or config.NOISE_ESTIMATOR
+    window_frames = config.NOISE_WINDOW_SECONDS * frame_rate
+
+    if name == 'vad':
+        return VADNoiseEstimator(config.NOISE_ALPHA)
+    if name == 'minimum_statistics':
+        return MinimumStatisticsEstimator(window_frames, config.MIN_STATS_SUBWINDOWS,
+                                          config.MIN_STATS_SMOOTHING, config.MIN_STATS_BIAS)
+    if name == 'mcra':
+        return MCRAEstimator(window_frames, alpha=config.MCRA_ALPHA, threshold=config.MCRA_THRESHOLD)
+    raise ValueError(f"Unknown noise estimator '{name}', expected one of {', '.join(NOISE_ESTIMATORS)}")
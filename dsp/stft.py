@@ -0,0 +1,122 @@
+import numpy as np
+from scipy import signal
+from config import DSPConfig
+
+
+class StreamingSTFT:
+    """Stateful STFT analysis / weighted overlap-add synthesis.
+
+    Samples are pushed in blocks of any length. Every complete hop of
+    ``hop_length`` samples yields one ``fft_size`` frame. Analysis and
+    synthesis both use the square root of ``WINDOW_TYPE``, so their product
+    is the configured window, which must satisfy COLA at the chosen hop.
+    The output of ``synthesize`` lags the input of ``analyze`` by exactly
+    ``latency_samples``.
+
+    With ``channels`` set, blocks have shape (channels, n_samples) and every
+    channel is transformed by the same batched FFT call per hop.
+    """
+
+    def __init__(self, fft_size=None, hop_length=None, window_type=None, channels=None):
+        self.config = DSPConfig()
+        self.fft_size = int(fft_size or self.config.FFT_SIZE)
+        self.hop_length = int(hop_length or self.config.HOP_LENGTH)
+        self.window_type = window_type or self.config.WINDOW_TYPE
+        self.channels = channels
+        self._leading_shape = () if channels is None else (int(channels),)
+
+        if self.fft_size % self.hop_length != 0:
+            raise ValueError(f"FFT size {self.fft_size} is not a multiple of hop length {self.hop_length}")
+
+        window = signal.get_window(self.window_type, self.fft_size)
+        if not signal.check_COLA(window, self.fft_size, self.fft_size - self.hop_length):
+            raise ValueError(f"'{self.window_type}' window does not satisfy COLA at hop {self.hop_length}")
+
+        self.window = np.sqrt(window)
+        # Overlapping copies of the window sum to this constant at our hop
+        overlap_gain = np.mean(np.sum(window.reshape(-1, self.hop_length), axis=0))
+        self.synthesis_window = self.window / overlap_gain
+
+        self.n_bins = self.fft_size // 2 + 1
+        self.latency_samples = self.fft_size - self.hop_length
+
+        self.reset()
+
+    def reset(self):
+        self._input_buffer = np.zeros(self._leading_shape + (self.latency_samples,))
+        self._output_buffer = np.zeros(self._leading_shape + (self.fft_size,))
+
+    def latency_ms(self, sample_rate):
+        return 1000.0 * self.latency_samples / sample_rate
+
+    def analyze(self, audio_block):
+        """Push samples and return the spectra of every newly completed hop.
+
+        Returns a complex array of shape ([channels,] n_frames, n_bins);
+        n_frames may be 0 when the block did not complete a hop.
+        """
+        buffer = np.concatenate((self._input_buffer, np.asarray(audio_block, dtype=np.float64)), axis=-1)
+        n_frames = (buffer.shape[-1] - self.latency_samples) // self.hop_length
+
+        if n_frames <= 0:
+            self._input_buffer = buffer
+            return np.empty(self._leading_shape + (0, self.n_bins), dtype=np.complex128)
+
+        frames = np.lib.stride_tricks.sliding_window_view(buffer, self.fft_size, axis=-1)
+        frames = frames[..., ::self.hop_length, :][..., :n_frames, :]
+        spectra = np.fft.rfft(frames * self.window, axis=-1)
+
+        self._input_buffer = buffer[..., n_frames * self.hop_length:].copy()
+        return spectra
+
+    @property
+    def pending_samples(self):
+        """Samples received but not yet part of a completed hop."""
+        return self._input_buffer.shape[-1] - self.latency_samples
+
+    def synthesize(self, spectra):
+        """Inverse-transform frames from ``analyze`` and return finished samples.
+
+        Produces ``hop_length`` samples per frame. The overlap-add of all
+        frames is done in one pass, accumulating each output sample in frame
+        order, so any batching of the same frames gives identical output.
+        """
+        hop = self.hop_length
+        n_frames = spectra.shape[-2]
+        overlap = self.fft_size // hop
+        leading = spectra.shape[:-2]
+
+        if n_frames == 0:
+            return np.empty(leading + (0,))
+
+        frames = np.fft.irfft(spectra, n=self.fft_size, axis=-1) * self.synthesis_window
+        frames = frames.reshape(leading + (n_frames, overlap, hop))
+
+        accumulator = np.zeros(leading + (n_frames + overlap, hop))
+        accumulator[..., :overlap, :] = self._output_buffer.reshape(leading + (overlap, hop))
+        # Block j of frame f lands on output block f + j; oldest frame first
+        for j in reversed(range(overlap)):
+            accumulator[..., j:j + n_frames, :] += frames[..., j, :]
+
+        self._output_buffer = accumulator[..., n_frames:, :].reshape(leading + (-1,)).copy()
+        return accumulator[..., :n_frames, :].reshape(leading + (-1,))
+
+    def process(self, audio_block, spectral_function=None):
+        spectra = self.analyze(audio_block)
+        if spectral_function is not None and spectra.shape[-2] > 0:
+            spectra = spectral_function(spectra)
+        return self.synthesize(spectra)
+
+    def analyze_signal(self, audio_data):
+        """Stateless analysis of a complete signal, without the streaming pre-roll.
+
+        Signals shorter than one frame are zero-padded to ``fft_size``. A
+        (n_channels, n_samples) signal gives (n_channels, n_frames, n_bins).
+        """
+        audio_data = np.asarray(audio_data, dtype=np.float64)
+        if audio_data.shape[-1] < self.fft_size:
+            padding = [(0, 0)] * (audio_data.ndim - 1) + [(0, self.fft_size - audio_data.shape[-1])]
+            audio_data = np.pad(audio_data, padding)
+
+        frames = np.lib.stride_tricks.sliding_window_view(audio_data, self.fft_size, axis=-1)
+        return np.fft.rfft(frames[..., ::self.hop_length, :] * self.window, axis=-1)
@@ -1,36 +1,38 @@
 import numpy as np
-from scipy import signal
 from config import DSPConfig
+from .gain_rules import GAIN_RULES
+from .gain_table import get_gain_table
 
 
 class WienerFilter:
+    """Wiener gain from the noise estimate shared with spectral subtraction."""
+
     def __init__(self):
         self.config = DSPConfig()
-        self.noise_power = None
-        self.signal_power = None
-        self.window = signal.get_window(self.config.WINDOW_TYPE, self.config.FFT_SIZE)
-
-    def estimate_noise_power(self, noise_frames):
-        all_noise = np.concatenate(noise_frames)
-        noise_spectrum = self._compute_power_spectrum(all_noise)
-        self.noise_power = noise_spectrum
-        print(f"Noise power estimated from {len(noise_frames)} frames")
-
-    def _compute_power_spectrum(self, audio_data):
-        if len(audio_data) < self.config.FFT_SIZE:
-            audio_data = np.pad(audio_data, (0, self.config.FFT_SIZE - len(audio_data)))
-
-        windowed = audio_data[:self.config.FFT_SIZE] * self.window
-        spectrum = np.fft.rfft(windowed, n=self.config.FFT_SIZE)
-        power = np.abs(spectrum) ** 2
-
-        return power
 
-    def _compute_wiener_gain(self, noisy_power):
-        if self.noise_power is None:
-            return np.ones_like(noisy_power)
-
-        snr = (noisy_power - self.noise_power) / (self.noise_power + 1e-10)
+        self.gain_rule = self.config.WIENER_GAIN_RULE
+        if self.gain_rule != 'power_subtraction' and self.gain_rule not in GAIN_RULES:
+            raise ValueError(f"Unknown Wiener gain rule '{self.gain_rule}', expected 'power_subtraction' "
+                             f"or one of {', '.join(GAIN_RULES)}")
+        if self.gain_rule in ('mmse_stsa', 'log_mmse') and self.config.WIENER_GAIN_TABLE:
+            # Built or loaded on the first lookup
+            self._gain_function = get_gain_table(self.gain_rule, self.config.GAIN_TABLE_CACHE_DIR).lookup
+        else:
+            self._gain_function = GAIN_RULES.get(self.gain_rule)
+        self.reset()
+
+    def reset(self):
+        """Forget the decision-directed state at the start of a new stream."""
+        # The clean power estimated for the previous frame
+        self.previous_clean_power = None
+
+    def gain_from_noise(self, noisy_power, noise_power):
+        """Return the Wiener gain for ``noisy_power`` frames given the noise power in
+        effect at each frame, from the shared noise estimator."""
+        if self.gain_rule != 'power_subtraction':
+            return self._decision_directed_gain(noisy_power, noise_power)
+
+        snr = (noisy_power - noise_power) / (noise_power + 1e-10)
         snr = np.maximum(snr, 0)
 
         gain = snr / (snr + 1)
@@ -38,50 +40,33 @@ class WienerFilter:
 
         return gain
 
-    def process(self, audio_frame):
-        if self.noise_power is None:
-            return audio_frame
-
-        original_length = len(audio_frame)
-
-        if len(audio_frame) < self.config.FFT_SIZE:
-            audio_frame = np.pad(audio_frame, (0, self.config.FFT_SIZE - len(audio_frame)))
-
-        windowed = audio_frame[:self.config.FFT_SIZE] * self.window
-        spectrum = np.fft.rfft(windowed, n=self.config.FFT_SIZE)
-        magnitude = np.abs(spectrum)
-        phase = np.angle(spectrum)
-        complex_spectrum = enhanced_magnitude * np.exp(1j * phase)
-        enhanced_audio = np.fft.irfft(complex_spectrum, n=self.config.FFT_SIZE)
-
-        return enhanced_audio[:original_length]
-
-    def adaptive_process(self, audio_frame, is_speech):
-        if self.noise_power is None:
-            return audio_frame
-
-        original_length = len(audio_frame)
-
-        if len(audio_frame) < self.config.FFT_SIZE:
-            audio_frame = np.pad(audio_frame, (0, self.config.FFT_SIZE - len(audio_frame)))
-
-        windowed = audio_frame[:self.config.FFT_SIZE] * self.window
-        spectrum = np.fft.rfft(windowed, n=self.config.FFT_SIZE)
-        magnitude = np.abs(spectrum)
-        phase = np.angle(spectrum)
-        power = magnitude ** 2
-
-        if not is_speech:
-            self.noise_power = (self.config.WIENER_ALPHA * self.noise_power +
-                              (1 - self.config.WIENER_ALPHA) * power)
-
-        gain = self._compute_wiener_gain(power)
-
-        enhanced_magnitude = magnitude * gain
-
-        complex_spectrum = enhanced_magnitude * np.exp(1j * phase)
-        enhanced_audio = np.fft.irfft(complex_spectrum, n=self.config.FFT_SIZE)
-
-        enhanced_audio = enhanced_audio * self.window[:len(enhanced_audio)]
-
-        return enhanced_audio[:original_length]
+    def _decision_directed_gain(self, noisy_power, noise_power):
+        """Apply the gain rule with the decision-directed a-priori SNR (Ephraim and Malah, 1984).
+
+        Each frame's a-priori SNR blends the previous frame's clean power
+        estimate with the current power subtraction estimate, which smooths
+        the gains over time and suppresses most musical noise. Frames are
+        taken in order since each depends on the previous gain.
+        """
+        noise_power = np.maximum(np.broadcast_to(noise_power, noisy_power.shape), 1e-10)
+        a_posteriori_snr = noisy_power / noise_power
+        alpha = self.config.DD_ALPHA
+        min_snr = 10 ** (self.config.DD_MIN_SNR_DB / 10)
+
+        previous = self.previous_clean_power
+        if previous is not None and previous.shape != noisy_power.shape[:-2] + noisy_power.shape[-1:]:
+            previous = None
+
+        gain = np.empty(noisy_power.shape)
+        for t in range(noisy_power.shape[-2]):
+            gamma = a_posteriori_snr[..., t, :]
+            a_priori_snr = np.maximum(gamma - 1.0, 0.0)
+            if previous is not None:
+                a_priori_snr = alpha * previous / noise_power[..., t, :] + (1.0 - alpha) * a_priori_snr
+            frame_gain = self._gain_function(np.maximum(a_priori_snr, min_snr), gamma)
+
+            gain[..., t, :] = frame_gain
+            previous = frame_gain ** 2 * noisy_power[..., t, :]
+
+        self.previous_clean_power = previous
+        return np.clip(gain, self.config.WIENER_MIN_GAIN, 1.0)
@@ -0,0 +1,68 @@
+import numpy as np
+
+
+class HistoryBuffer:
+    """The last ``size`` values of a series in a preallocated array.
+
+    Every value is stored twice, ``size`` apart, so the history is always one
+    contiguous slice in oldest-first order: ``values()`` is a view, and
+    appending never allocates.
+    """
+
+    def __init__(self, size):
+        self.size = int(size)
+        self._data = np.zeros(2 * self.size)
+        self._position = 0
+        self.count = 0
+
+    def append(self, value):
+        self._data[self._position] = value
+        self._data[self._position + self.size] = value
+        self._position = (self._position + 1) % self.size
+        self.count = min(self.count + 1, self.size)
+
+    def values(self):
+        end = self._position + self.size
+        return self._data[end - self.count:end]
+
+    def clear(self):
+        self._position = 0
+        self.count = 0
+
+
+class BlitManager:
+    """Redraw a fixed set of animated artists over a cached background.
+
+    The static parts of the figure (axes, labels, grid) are rendered once
+    and cached on every full draw; ``update`` then only restores that
+    background and draws the animated artists. Call ``canvas.draw_idle()``
+    instead when something static changes, e.g. axis limits.
+    """
+
+    def __init__(self, canvas, artists):
+        self.canvas = canvas
+        self.artists = list(artists)
+        self._background = None
+
+        for artist in self.artists:
+            artist.set_animated(True)
+        canvas.mpl_connect('draw_event', self._on_draw)
+
+    def _on_draw(self, event):
+        self._background = self.canvas.copy_from_bbox(self.canvas.figure.bbox)
+        self._draw_artists()
+
+    def _draw_artists(self):
+        figure = self.canvas.figure
+        for artist in self.artists:
+            figure.draw_artist(artist)
+
+    def update(self):
+        if self._background is None:
+            # The first full draw caches the background and draws the artists
+            self.canvas.draw()
+            return
+
+        self.canvas.restore_region(self._background)
+        self._draw_artists()
+        self.canvas.blit(self.canvas.figure.bbox)
@@ -1,11 +1,10 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 from matplotlib.figure import Figure
 import numpy as np
-import pyaudio
 from config import GUIConfig
+from .live_plot import BlitManager, HistoryBuffer
 
 
 class MainWindow:
@@ -20,10 +19,16 @@ class MainWindow:
         self.is_processing = False
         self.is_recording = False
         self.update_job = None
+        self.plot_job = None
 
         self.selected_input_device = None
-        self.speech_prob_history = []
-        self.processing_time_history = []
+        self.speech_prob_history = HistoryBuffer(self.config.PLOT_HISTORY)
+        self.processing_time_history = HistoryBuffer(self.config.PLOT_HISTORY)
+        self._plot_x = np.arange(self.config.PLOT_HISTORY)
+        # Bumped by stats polling whenever a point is added; plots redraw only when it moves
+        self._history_version = 0
+        self._drawn_version = 0
+        self._last_frames_processed = None
 
         self._create_widgets()
         self._setup_layout()
@@ -113,21 +118,62 @@ class MainWindow:
         viz_frame.grid(row=3, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
 
         self.fig = Figure(figsize=(8, 6), dpi=100)
-        self.ax1 = self.fig.add_subplot(2, 1, 1)
-        self.ax2 = self.fig.add_subplot(2, 1, 2)
+        self.ax1 = self.fig.add_subplot(2, 2, 1)
+        self.ax2 = self.fig.add_subplot(2, 2, 3)
+        self.ax3 = self.fig.add_subplot(2, 2, 2)
+        self.ax4 = self.fig.add_subplot(2, 2, 4)
 
         self.ax1.set_title("Speech Probability")
-        self.ax1.set_xlabel("Time")
+        self.ax1.set_xlabel("Frame")
         self.ax1.set_ylabel("Probability")
+        self.ax1.set_xlim(0, self.config.PLOT_HISTORY - 1)
         self.ax1.set_ylim(0, 1)
         self.ax1.grid(True, alpha=0.3)
+        self.ax1.axhline(y=0.5, color='r', linestyle='--', alpha=0.5)
 
         self.ax2.set_title("Processing Time")
-        self.ax2.set_xlabel("Time")
+        self.ax2.set_xlabel("Frame")
         self.ax2.set_ylabel("Time (ms)")
+        self.ax2.set_xlim(0, self.config.PLOT_HISTORY - 1)
+        self.ax2.set_ylim(0, 1.0)
         self.ax2.grid(True, alpha=0.3)
 
+        # Spectra come from the processing chain itself, decimated for display
+        self.spectrogram = self.audio_processor.enable_spectrogram(
+            self.config.SPECTROGRAM_HISTORY, self.config.SPECTROGRAM_BINS, self.config.SPECTROGRAM_DECIMATION)
+        self._drawn_spectrogram_version = self.spectrogram.version
+        self._spectrum_top_db = None
+
+        self.ax3.set_title("Spectrogram")
+        self.ax3.set_xlabel("Time")
+        self.ax3.set_yticks([0.5, 1.5])
+        self.ax3.set_yticklabels(["Enhanced", "Input"])
+        self.ax3.set_xticks([])
+        self.ax3.axhline(y=1.0, color='w', linewidth=1)
+
+        self.ax4.set_title("Noise Estimate")
+        self.ax4.set_xlabel("Frequency (Hz)")
+        self.ax4.set_ylabel("Level (dB)")
+        self.ax4.set_xlim(0, self.spectrogram.sample_rate / 2)
+        self.ax4.grid(True, alpha=0.3)
+
+        # Persistent artists: updates only replace their data
+        self.prob_line, = self.ax1.plot([], [], 'b-', linewidth=2, markersize=6)
+        self.time_line, = self.ax2.plot([], [], 'g-', linewidth=2)
+        # Input stacked over enhanced output in one image, oldest column on the left
+        self.spectrogram_image = self.ax3.imshow(
+            np.full((2 * self.spectrogram.n_display_bins, self.spectrogram.history), np.nan),
+            origin='lower', aspect='auto', cmap='magma', interpolation='nearest',
+            extent=(0, self.spectrogram.history, 0, 2), vmin=0, vmax=self.config.SPECTROGRAM_RANGE_DB)
+        self.input_spectrum_line, = self.ax4.plot([], [], color='0.6', linewidth=1, label="Input")
+        self.noise_line, = self.ax4.plot([], [], 'm-', linewidth=1.5, label="Noise estimate")
+        self.ax4.legend(loc='upper right', fontsize='small')
+
+        self.fig.tight_layout()
+
         self.canvas = FigureCanvasTkAgg(self.fig, master=viz_frame)
+        self.blit_manager = BlitManager(self.canvas, [self.prob_line, self.time_line, self.spectrogram_image,
+                                                      self.input_spectrum_line, self.noise_line])
         self.canvas.draw()
         self.canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
 
@@ -199,9 +245,11 @@ class MainWindow:
             self.status_label.config(text="Status: Processing", foreground="green")
 
             self._update_display()
+            self._update_plots()
 
-        except (OSError, tk.TclError) as e:
-            # Catch OSError which PyAudio commonly raises for device errors.
+        except (OSError, ValueError, tk.TclError) as e:
+            # Catch OSError which PyAudio commonly raises for device errors, and ValueError
+            # for a VAD model that does not fit the device rate or block size.
             messagebox.showerror("Error", f"Failed to start processing: {str(e)}")
             self.status_label.config(text="Status: Error", foreground="red")
 
@@ -215,6 +263,9 @@ class MainWindow:
         if self.update_job:
             self.root.after_cancel(self.update_job)
             self.update_job = None
+        if self.plot_job:
+            self.root.after_cancel(self.plot_job)
+            self.plot_job = None
 
         self.start_btn.config(state=tk.NORMAL)
         self.stop_btn.config(state=tk.DISABLED)
@@ -266,55 +317,104 @@ class MainWindow:
             self.stats_label.config(
                 text=f"Frames: {stats['frames_processed']} | "
                      f"Speech: {stats['speech_frames']} | "
-                     f"Noise: {stats['noise_frames']}"
+                     f"Noise: {stats['noise_frames']} | "
+                     f"Overruns: {stats.get('overruns', 0)}"
             )
 
-            # Ensure we append a valid numeric value for plotting (no None/NaN)
-            try:
-                prob = float(stats.get('current_speech_prob', 0.0))
-            except Exception:
-                prob = 0.0
-            # Clamp to [0,1]
-            if prob != prob:  # NaN check
-                prob = 0.0
-            prob = max(0.0, min(1.0, prob))
-            self.speech_prob_history.append(prob)
-            if len(self.speech_prob_history) > self.config.PLOT_HISTORY:
-                self.speech_prob_history.pop(0)
-
-            self.processing_time_history.append(stats['processing_time_ms'])
-            if len(self.processing_time_history) > self.config.PLOT_HISTORY:
-                self.processing_time_history.pop(0)
-
-            self.ax1.clear()
-            self.ax1.set_title("Speech Probability")
-            self.ax1.set_xlabel("Frame")
-            self.ax1.set_ylabel("Probability")
-            self.ax1.set_ylim(0, 1)
-            self.ax1.grid(True, alpha=0.3)
-            if len(self.speech_prob_history) > 0:
-                # for small numbers of points, draw markers so the user can see activity
-                if len(self.speech_prob_history) <= 2:
-                    self.ax1.plot(self.speech_prob_history, 'bo-', linewidth=2, markersize=6)
-                else:
-                    self.ax1.plot(self.speech_prob_history, 'b-', linewidth=2)
-                self.ax1.axhline(y=0.5, color='r', linestyle='--', alpha=0.5)
+            # Only add a point when a new frame was processed, so a stalled stream leaves the plots alone
+            if stats['frames_processed'] != self._last_frames_processed:
+                self._last_frames_processed = stats['frames_processed']
 
-            self.ax2.clear()
-            self.ax2.set_title("Processing Time")
-            self.ax2.set_xlabel("Frame")
-            self.ax2.set_ylabel("Time (ms)")
-            self.ax2.grid(True, alpha=0.3)
-            if len(self.processing_time_history) > 0:
-                self.ax2.plot(self.processing_time_history, 'g-', linewidth=2)
+                # Ensure we append a valid numeric value for plotting (no None/NaN)
+                try:
+                    prob = float(stats.get('current_speech_prob', 0.0))
+                except Exception:
+                    prob = 0.0
+                # Clamp to [0,1]
+                if prob != prob:  # NaN check
+                    prob = 0.0
+                prob = max(0.0, min(1.0, prob))
 
-            self.canvas.draw()
+                self.speech_prob_history.append(prob)
+                self.processing_time_history.append(stats['processing_time_ms'])
+                self._history_version += 1
 
         except (tk.TclError, RuntimeError) as e:
             print(f"Error updating display: {e}")
 
         self.update_job = self.root.after(self.config.UPDATE_INTERVAL, self._update_display)
 
+    def _update_plots(self):
+        if not self.is_processing:
+            return
+
+        history_changed = self._history_version != self._drawn_version
+        spectrogram_changed = self.spectrogram.version != self._drawn_spectrogram_version
+
+        if history_changed or spectrogram_changed:
+            self._drawn_version = self._history_version
+            self._drawn_spectrogram_version = self.spectrogram.version
+            try:
+                # Changing limits alters the static background, which needs one full redraw
+                full_redraw = False
+                if history_changed:
+                    full_redraw |= self._draw_history()
+                if spectrogram_changed:
+                    full_redraw |= self._draw_spectrogram()
+
+                if full_redraw:
+                    self.canvas.draw_idle()
+                else:
+                    self.blit_manager.update()
+            except (tk.TclError, RuntimeError) as e:
+                print(f"Error updating plots: {e}")
+
+        self.plot_job = self.root.after(self.config.PLOT_INTERVAL, self._update_plots)
+
+    def _draw_history(self):
+        probs = self.speech_prob_history.values()
+        times = self.processing_time_history.values()
+        x = self._plot_x[:len(probs)]
+
+        self.prob_line.set_data(x, probs)
+        # for small numbers of points, draw markers so the user can see activity
+        self.prob_line.set_marker('o' if len(probs) <= 2 else 'None')
+        self.time_line.set_data(x, times)
+
+        top = self.ax2.get_ylim()[1]
+        new_top = max(1.5 * float(np.max(times)), 1.0) if len(times) > 0 else 1.0
+        if new_top > 1.5 * top or new_top < 0.5 * top:
+            self.ax2.set_ylim(0, new_top)
+            return True
+        return False
+
+    def _draw_spectrogram(self):
+        input_db, output_db, noise_db = self.spectrogram.snapshot()
+        self.spectrogram_image.set_data(np.vstack((output_db, input_db)))
+
+        # The newest input column against the noise estimate shows how closely it tracks
+        frequencies = self.spectrogram.frequencies
+        self.input_spectrum_line.set_data(frequencies, input_db[:, -1])
+        self.noise_line.set_data(frequencies, noise_db)
+
+        finite = input_db[np.isfinite(input_db)]
+        if len(finite) == 0:
+            return False
+
+        # The colour scale belongs to the animated image; only the noise axis limits are static
+        top_db = float(np.max(finite))
+        self.spectrogram_image.set_clim(top_db - self.config.SPECTROGRAM_RANGE_DB, top_db)
+
+        full_redraw = False
+        if self._spectrum_top_db is None or abs(top_db - self._spectrum_top_db) > 10:
+            self._spectrum_top_db = top_db
+            self.ax4.set_ylim(top_db - self.config.SPECTROGRAM_RANGE_DB, top_db + 5)
+            full_redraw = True
+        if self.ax4.get_xlim()[1] != self.spectrogram.sample_rate / 2:
+            self.ax4.set_xlim(0, self.spectrogram.sample_rate / 2)
+            full_redraw = True
+        return full_redraw
+
     def run(self):
         self.root.protocol("WM_DELETE_WINDOW", self._on_closing)
         self.root.mainloop()
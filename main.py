@@ -1,13 +1,14 @@
+import argparse
 import sys
 import os
 
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from audio_processor import AudioProcessor
-from gui import MainWindow
 
+def run_gui():
+    from audio_processor import AudioProcessor
+    from gui import MainWindow
 
-def main():
     print("=" * 60)
     print("Real-Time Speech Enhancement System")
     print("DSP Project - BTech ECE AIML")
@@ -36,5 +37,41 @@ def main():
         print("Application closed")
 
 
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Real-Time Speech Enhancement System")
+    subparsers = parser.add_subparsers(dest='command')
+
+    subparsers.add_parser('gui', help="Run the interactive GUI (default)")
+
+    enhance_parser = subparsers.add_parser('enhance', help="Enhance WAV files offline, without audio devices")
+    from batch_enhance import add_enhance_arguments
+    add_enhance_arguments(enhance_parser)
+
+    serve_parser = subparsers.add_parser('serve', help="Run live enhancement headless, without Tk or matplotlib")
+    from service import add_serve_arguments
+    add_serve_arguments(serve_parser)
+
+    train_vad_parser = subparsers.add_parser('train-vad', help="Train the VAD classifier from labeled WAV files")
+    from ml.train_vad import add_train_vad_arguments
+    add_train_vad_arguments(train_vad_parser)
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'enhance':
+        from batch_enhance import run_enhance
+        return run_enhance(args)
+
+    if args.command == 'serve':
+        from service import run_serve
+        return run_serve(args)
+
+    if args.command == 'train-vad':
+        from ml.train_vad import run_train_vad
+        return run_train_vad(args)
+
+    run_gui()
+    return 0
+
+
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -1,3 +1,4 @@
-from .voice_activity_detector import VoiceActivityDetector
+from .voice_activity_detector import FrameFeatures, VoiceActivityDetector
+from .trained_vad import TrainedVADModel, VADFeatureExtractor, load_vad_model
 
-__all__ = ['VoiceActivityDetector']
+__all__ = ['FrameFeatures', 'VoiceActivityDetector', 'TrainedVADModel', 'VADFeatureExtractor', 'load_vad_model']
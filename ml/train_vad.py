@@ -0,0 +1,142 @@
+"""Train the VAD frame classifier from WAV files labeled in Audacity.
+
+    python main.py train-vad data/ -o models/vad.npz
+
+Each ``<name>.wav`` needs a ``<name>.txt`` label track next to it, exported
+from Audacity (File > Export > Export Labels), whose regions mark speech.
+Frames whose centre falls inside a region are speech; all others are not.
+scikit-learn is only needed here; the saved model runs on NumPy alone.
+"""
+import os
+import numpy as np
+from config import AudioConfig
+from utils.audio_utils import load_audio_from_wav
+from .trained_vad import TrainedVADModel, VADFeatureExtractor
+
+
+def read_audacity_labels(path):
+    """Return the (start, end) seconds of every region in an Audacity label file."""
+    regions = []
+    with open(path) as f:
+        for line in f:
+            # Lines starting with a backslash hold the optional frequency range of the label above
+            if not line.strip() or line.startswith('\\'):
+                continue
+            fields = line.split('\t')
+            regions.append((float(fields[0]), float(fields[1])))
+    return regions
+
+
+def frame_labels(regions, n_frames, frame_length, sample_rate):
+    centres = (np.arange(n_frames) * frame_length + frame_length / 2) / sample_rate
+    labels = np.zeros(n_frames, dtype=bool)
+    for start, end in regions:
+        labels |= (centres >= start) & (centres < end)
+    return labels
+
+
+def collect_labeled_files(paths):
+    """Return (wav, labels) pairs for the given WAV files and directories."""
+    pairs = []
+    for path in paths:
+        if os.path.isdir(path):
+            wav_paths = [os.path.join(path, name) for name in sorted(os.listdir(path))
+                         if name.lower().endswith('.wav')]
+        else:
+            wav_paths = [path]
+
+        for wav_path in wav_paths:
+            label_path = os.path.splitext(wav_path)[0] + '.txt'
+            if os.path.exists(label_path):
+                pairs.append((wav_path, label_path))
+            else:
+                print(f"Skipping {wav_path}: no label file {label_path}")
+    return pairs
+
+
+def load_training_set(pairs, frame_length, n_mels):
+    """Return (features, labels, file index of each frame, sample rates) for labeled WAV files."""
+    extractor = VADFeatureExtractor(n_mels)
+    features, labels, groups, sample_rates = [], [], [], []
+
+    for index, (wav_path, label_path) in enumerate(pairs):
+        audio, sample_rate = load_audio_from_wav(wav_path)
+        n_frames = len(audio) // frame_length
+        frames = audio[:n_frames * frame_length].reshape(n_frames, frame_length)
+
+        file_features, _ = extractor.compute(frames, sample_rate)
+        features.append(file_features)
+        labels.append(frame_labels(read_audacity_labels(label_path), n_frames, frame_length, sample_rate))
+        groups.append(np.full(n_frames, index))
+        sample_rates.append(sample_rate)
+
+    return np.concatenate(features), np.concatenate(labels), np.concatenate(groups), sample_rates
+
+
+def train_vad_model(features, labels, sample_rate, frame_length, n_mels, regularization=1.0):
+    from sklearn.linear_model import LogisticRegression
+
+    mean = np.mean(features, axis=0)
+    scale = np.std(features, axis=0) + 1e-6
+    classifier = LogisticRegression(C=regularization, class_weight='balanced', max_iter=1000)
+    classifier.fit((features - mean) / scale, labels)
+
+    return TrainedVADModel(classifier.coef_[0], classifier.intercept_[0], mean, scale,
+                           sample_rate, frame_length, n_mels)
+
+
+def evaluate_vad_model(model, features, labels, threshold=0.5):
+    predictions = model.predict_proba(features) > threshold
+    speech = np.sum(labels)
+    return {
+        'accuracy': float(np.mean(predictions == labels)),
+        'speech_recall': float(np.sum(predictions & labels) / speech) if speech > 0 else float('nan'),
+        'false_alarm_rate': float(np.sum(predictions & ~labels) / max(1, np.sum(~labels))),
+    }
+
+
+def add_train_vad_arguments(parser):
+    parser.add_argument('inputs', nargs='+', help="Labeled WAV files or directories of them")
+    parser.add_argument('-o', '--output', default=os.path.join('models', 'vad.npz'),
+                        help="Where to write the model (default: models/vad.npz)")
+    parser.add_argument('--frame-length', type=int, default=AudioConfig.CHUNK_SIZE,
+                        help="Samples per classified frame (default: CHUNK_SIZE)")
+    parser.add_argument('--mels', type=int, default=24, help="Number of mel bands (default: 24)")
+    parser.add_argument('-C', '--regularization', type=float, default=1.0,
+                        help="Inverse L2 regularization strength (default: 1.0)")
+    parser.add_argument('--validation-files', type=int, default=1,
+                        help="Files held out to report accuracy on unseen audio (default: 1)")
+
+
+def run_train_vad(args):
+    pairs = collect_labeled_files(args.inputs)
+    if len(pairs) == 0:
+        print("No labeled WAV files found")
+        return 1
+
+    features, labels, groups, sample_rates = load_training_set(pairs, args.frame_length, args.mels)
+    if len(set(sample_rates)) > 1:
+        # Mel bands and frame durations depend on the rate, so one model cannot cover several
+        print(f"Training files have different sample rates {sorted(set(sample_rates))}; "
+              f"resample them to one rate")
+        return 1
+    print(f"{len(labels)} frames from {len(pairs)} file(s), {100 * np.mean(labels):.1f}% speech")
+
+    # Hold out whole files, so the score reflects recordings the model has not heard
+    n_validation = min(args.validation_files, len(pairs) - 1)
+    if n_validation > 0:
+        held_out = groups >= len(pairs) - n_validation
+        model = train_vad_model(features[~held_out], labels[~held_out], sample_rates[0],
+                                args.frame_length, args.mels, args.regularization)
+        scores = evaluate_vad_model(model, features[held_out], labels[held_out])
+        print(f"Validation on {n_validation} file(s): accuracy {scores['accuracy']:.3f}, "
+              f"speech recall {scores['speech_recall']:.3f}, false alarms {scores['false_alarm_rate']:.3f}")
+
+    model = train_vad_model(features, labels, sample_rates[0], args.frame_length, args.mels, args.regularization)
+    scores = evaluate_vad_model(model, features, labels)
+    print(f"Training accuracy {scores['accuracy']:.3f}")
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    model.save(args.output)
+    print(f"Model saved to {args.output}")
+    return 0
@@ -0,0 +1,138 @@
+import numpy as np
+
+
+MODEL_FORMAT_VERSION = 1
+
+# Mel bands span the speech range; at sample rates below 16 kHz the top bands stay empty
+MEL_MIN_HZ = 60.0
+MEL_MAX_HZ = 8000.0
+
+_models = {}
+
+
+def _hz_to_mel(hz):
+    return 2595.0 * np.log10(1.0 + hz / 700.0)
+
+
+def _mel_to_hz(mel):
+    return 700.0 * (10 ** (mel / 2595.0) - 1.0)
+
+
+def mel_filterbank(sample_rate, n_fft, n_mels):
+    """Triangular mel filters of shape (n_mels, n_fft // 2 + 1) between MEL_MIN_HZ and MEL_MAX_HZ."""
+    edges = _mel_to_hz(np.linspace(_hz_to_mel(MEL_MIN_HZ), _hz_to_mel(MEL_MAX_HZ), n_mels + 2))
+    freqs = np.fft.rfftfreq(n_fft, 1.0 / sample_rate)
+
+    lower, center, upper = edges[:-2, np.newaxis], edges[1:-1, np.newaxis], edges[2:, np.newaxis]
+    rising = (freqs - lower) / (center - lower)
+    falling = (upper - freqs) / (upper - center)
+    return np.maximum(0.0, np.minimum(rising, falling))
+
+
+class VADFeatureExtractor:
+    """Frame features for the trained VAD, computed for a whole (n_frames, frame_length) array at once.
+
+    Per frame: ``n_mels`` log-mel energies, their change from the previous
+    frame, zero-crossing rate, spectral flatness and log energy. Deltas are
+    causal, so a stream gives the same features as the whole signal when the
+    last log-mel frame is carried over between calls.
+    """
+
+    def __init__(self, n_mels=24):
+        self.n_mels = n_mels
+        self._filterbanks = {}
+        self._windows = {}
+
+    @property
+    def n_features(self):
+        return 2 * self.n_mels + 3
+
+    def _filterbank(self, sample_rate, n_fft):
+        key = (sample_rate, n_fft)
+        if key not in self._filterbanks:
+            self._filterbanks[key] = mel_filterbank(sample_rate, n_fft, self.n_mels).T
+        return self._filterbanks[key]
+
+    def _window(self, frame_length):
+        if frame_length not in self._windows:
+            self._windows[frame_length] = np.hanning(frame_length)
+        return self._windows[frame_length]
+
+    def compute(self, frames, sample_rate, previous_log_mel=None):
+        """Return (features of shape (n_frames, n_features), log-mel of the last frame)."""
+        frames = np.atleast_2d(np.asarray(frames, dtype=np.float64)) / 32768.0
+        frame_length = frames.shape[-1]
+        n_fft = 1 << max(0, int(frame_length - 1).bit_length())
+
+        # Power per sample, so features do not depend on the frame length
+        power = np.abs(np.fft.rfft(frames * self._window(frame_length), n_fft)) ** 2 / frame_length
+        log_mel = np.log(power @ self._filterbank(sample_rate, n_fft) + 1e-10)
+
+        previous = log_mel[:1] if previous_log_mel is None else previous_log_mel[np.newaxis]
+        deltas = np.diff(np.concatenate((previous, log_mel)), axis=0)
+
+        zcr = np.sum(np.abs(np.diff(np.sign(frames), axis=-1)), axis=-1) / (2 * frame_length)
+        log_power = np.log(power + 1e-10)
+        flatness = np.exp(np.mean(log_power, axis=-1)) / (np.mean(power, axis=-1) + 1e-10)
+        log_energy = np.log(np.mean(frames ** 2, axis=-1) + 1e-10)
+
+        features = np.column_stack((log_mel, deltas, zcr, flatness, log_energy))
+        return features, log_mel[-1] if len(log_mel) > 0 else previous_log_mel
+
+
+class TrainedVADModel:
+    """Logistic regression over VADFeatureExtractor features, evaluated with NumPy only.
+
+    Feature standardization is folded into the weights, so a batch of
+    frames costs one matrix-vector product.
+    """
+
+    def __init__(self, weights, bias, mean, scale, sample_rate, frame_length, n_mels):
+        self.weights = np.asarray(weights, dtype=np.float64)
+        self.bias = float(bias)
+        self.mean = np.asarray(mean, dtype=np.float64)
+        self.scale = np.asarray(scale, dtype=np.float64)
+        self.sample_rate = int(sample_rate)
+        self.frame_length = int(frame_length)
+        self.n_mels = int(n_mels)
+
+        self._weights = self.weights / self.scale
+        self._bias = self.bias - np.dot(self.mean / self.scale, self.weights)
+
+    def check_input(self, sample_rate, frame_length=None):
+        """Raise ValueError unless audio has the sample rate and frame length the model was trained on."""
+        if sample_rate != self.sample_rate:
+            raise ValueError(f"VAD model was trained on {self.sample_rate} Hz audio, got {sample_rate} Hz")
+        if frame_length is not None and frame_length != self.frame_length:
+            raise ValueError(f"VAD model was trained on {self.frame_length}-sample frames, got {frame_length}; "
+                             f"match PROCESS_BLOCK_SIZE/CHUNK_SIZE or retrain with --frame-length")
+
+    def predict_proba(self, features):
+        """Speech probability of each row of ``features``."""
+        return 1.0 / (1.0 + np.exp(-(features @ self._weights + self._bias)))
+
+    def save(self, path):
+        np.savez(path, format_version=MODEL_FORMAT_VERSION, weights=self.weights, bias=self.bias,
+                 mean=self.mean, scale=self.scale, sample_rate=self.sample_rate,
+                 frame_length=self.frame_length, n_mels=self.n_mels)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            version = int(data['format_version'])
+            if version != MODEL_FORMAT_VERSION:
+                raise ValueError(f"{path}: VAD model format {version} is not supported "
+                                 f"(expected {MODEL_FORMAT_VERSION})")
+            model = cls(data['weights'], data['bias'], data['mean'], data['scale'], data['sample_rate'],
+                        data['frame_length'], data['n_mels'])
+
+        if model.weights.shape != (2 * model.n_mels + 3,):
+            raise ValueError(f"{path}: expected {2 * model.n_mels + 3} weights, got {model.weights.shape}")
+        return model
+
+
+def load_vad_model(path):
+    """Return the model at ``path``, loading it once per process."""
+    if path not in _models:
+        _models[path] = TrainedVADModel.load(path)
+    return _models[path]
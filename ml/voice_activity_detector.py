@@ -1,11 +1,37 @@
 import numpy as np
-from scipy import signal
-from config import DSPConfig
+from collections import deque
+from config import AudioConfig, DSPConfig
+from .trained_vad import VADFeatureExtractor, load_vad_model
+
+
+class FrameFeatures:
+    """VAD features of one capture frame, computed once and shared by all consumers.
+
+    From ``extract_features_batch`` every field holds one entry per frame.
+    """
+
+    __slots__ = ('energy', 'zcr', 'spectral_centroid', 'magnitude', 'model_features')
+
+    def __init__(self, energy, zcr, spectral_centroid, magnitude=None, model_features=None):
+        self.energy = energy
+        self.zcr = zcr
+        self.spectral_centroid = spectral_centroid
+        self.magnitude = magnitude
+        self.model_features = model_features
 
 
 class VoiceActivityDetector:
-    def __init__(self):
+    def __init__(self, sample_rate=None):
         self.config = DSPConfig()
+
+        # A trained classifier replaces the hand-tuned rules when configured
+        self.model = None
+        if self.config.VAD_MODEL_PATH:
+            self.model = load_vad_model(self.config.VAD_MODEL_PATH)
+            self.feature_extractor = VADFeatureExtractor(self.model.n_mels)
+        self._previous_log_mel = None
+
+        self.sample_rate = sample_rate or AudioConfig.RATE
         # Use a lower sensible default if config value is too large for int16-normalized energy
         default_thresh = getattr(self.config, 'VAD_DEFAULT_THRESHOLD', None)
         if default_thresh is not None:
@@ -13,10 +39,21 @@ class VoiceActivityDetector:
         else:
             self.energy_threshold = self.config.VAD_THRESHOLD
         self.smoothing_window = self.config.VAD_SMOOTHING
-        self.recent_decisions = []
+        self.recent_decisions = deque(maxlen=self.smoothing_window)
         self.noise_floor = None
         self.is_calibrated = False
 
+    @property
+    def sample_rate(self):
+        return self._sample_rate
+
+    @sample_rate.setter
+    def sample_rate(self, sample_rate):
+        # A model only holds for the rate it was trained at
+        if self.model is not None:
+            self.model.check_input(sample_rate)
+        self._sample_rate = sample_rate
+
     def calibrate_noise_floor(self, noise_frames):
         if len(noise_frames) == 0:
             return
@@ -27,55 +64,187 @@ class VoiceActivityDetector:
         self.is_calibrated = True
         print(f"VAD calibrated: noise floor = {self.noise_floor:.6f}, threshold = {self.energy_threshold:.6f}")
 
+    # The feature helpers work along the last axis, on one frame or a (n_frames, frame_length) array
+
     def _compute_energy(self, audio_frame):
         normalized = audio_frame.astype(np.float32) / 32768.0
-        energy = np.mean(normalized ** 2)
+        energy = np.mean(np.square(normalized, out=normalized), axis=-1)
         return energy
 
     def _compute_zero_crossing_rate(self, audio_frame):
         signs = np.sign(audio_frame)
-        zero_crossings = np.sum(np.abs(np.diff(signs))) / (2 * len(audio_frame))
+        zero_crossings = np.sum(np.abs(np.diff(signs, axis=-1)), axis=-1) / (2 * audio_frame.shape[-1])
         return zero_crossings
 
     def _compute_spectral_centroid(self, audio_frame):
         fft_size = 512
-        if len(audio_frame) < fft_size:
-            audio_frame = np.pad(audio_frame, (0, fft_size - len(audio_frame)))
+        if audio_frame.shape[-1] < fft_size:
+            padding = [(0, 0)] * (audio_frame.ndim - 1) + [(0, fft_size - audio_frame.shape[-1])]
+            audio_frame = np.pad(audio_frame, padding)
 
-        spectrum = np.abs(np.fft.rfft(audio_frame[:fft_size]))
-        freqs = np.fft.rfftfreq(fft_size, 1.0 / 16000)
+        spectrum = np.abs(np.fft.rfft(audio_frame[..., :fft_size], axis=-1))
+        return self._centroid_from_magnitude(spectrum, fft_size)
 
-        if np.sum(spectrum) == 0:
-            return 0
+    def _centroid_from_magnitude(self, magnitude, fft_size):
+        total = np.sum(magnitude, axis=-1)
+        freqs = np.fft.rfftfreq(fft_size, 1.0 / self.sample_rate)
+        weighted = np.sum(freqs * magnitude, axis=-1)
+        return np.divide(weighted, total, out=np.zeros_like(weighted), where=total != 0)
 
-        centroid = np.sum(freqs * spectrum) / np.sum(spectrum)
-        return centroid
+    def extract_features(self, audio_frame, magnitude=None, fft_size=None):
+        """Compute all features of a frame in one pass.
 
-    def detect(self, audio_frame):
+        ``magnitude`` may hold STFT magnitude frames (n_frames, n_bins) that
+        cover this audio, e.g. from the enhancement chain, in which case the
+        centroid is taken from their mean instead of a separate FFT. With a
+        trained model, a frame shorter than the model's, such as the end of a
+        stream, is zero-padded for it.
+        """
         energy = self._compute_energy(audio_frame)
-
         zcr = self._compute_zero_crossing_rate(audio_frame)
 
-        spectral_centroid = self._compute_spectral_centroid(audio_frame)
+        if magnitude is not None and len(magnitude) > 0:
+            mean_magnitude = np.mean(magnitude, axis=0)
+            fft_size = fft_size or 2 * (mean_magnitude.shape[-1] - 1)
+            spectral_centroid = self._centroid_from_magnitude(mean_magnitude, fft_size)
+        else:
+            spectral_centroid = self._compute_spectral_centroid(audio_frame)
+
+        model_frame = audio_frame
+        if self.model is not None and audio_frame.shape[-1] < self.model.frame_length:
+            model_frame = np.pad(audio_frame, (0, self.model.frame_length - audio_frame.shape[-1]))
+        return FrameFeatures(energy, zcr, spectral_centroid, magnitude, self._model_features(model_frame))
+
+    def _model_features(self, audio_frame):
+        # Streaming: the next frame's deltas are taken against this one
+        if self.model is None:
+            return None
+        features, self._previous_log_mel = self._compute_model_features(audio_frame, self._previous_log_mel)
+        return features
+
+    def _compute_model_features(self, audio_frame, previous_log_mel):
+        """Return (model features, log-mel of the last frame) with deltas against ``previous_log_mel``."""
+        # Features of other frame lengths or rates differ from the ones the model was trained on
+        self.model.check_input(self.sample_rate, np.shape(audio_frame)[-1])
+        return self.feature_extractor.compute(audio_frame, self.sample_rate, previous_log_mel)
+
+    def extract_features_batch(self, frames, magnitude=None, bounds=None, fft_size=None):
+        """Compute the features of every row of an (n_frames, frame_length) array at once.
+
+        ``magnitude`` may hold STFT magnitude frames covering the audio, with
+        frame ``i`` covered by rows ``bounds[i]:bounds[i + 1]``, as in
+        ``extract_features``. Frames with no covering rows get their own FFT.
+        """
+        frames = np.asarray(frames)
+        energy = self._compute_energy(frames)
+        zcr = self._compute_zero_crossing_rate(frames)
 
-        energy_decision = energy > self.energy_threshold
+        covered = np.zeros(len(frames), dtype=bool)
+        spectral_centroid = np.zeros(len(frames))
+        if magnitude is not None and len(frames) > 0:
+            bounds = np.asarray(bounds)
+            covered = bounds[1:] > bounds[:-1]
+            if np.any(covered):
+                # Consecutive non-empty segments tile magnitude[bounds[0]:bounds[-1]]
+                sums = np.add.reduceat(magnitude[:bounds[-1]], bounds[:-1][covered], axis=0)
+                mean_magnitude = sums / (bounds[1:] - bounds[:-1])[covered, np.newaxis]
+                fft_size = fft_size or 2 * (mean_magnitude.shape[-1] - 1)
+                spectral_centroid[covered] = self._centroid_from_magnitude(mean_magnitude, fft_size)
+        if not np.all(covered):
+            spectral_centroid[~covered] = self._compute_spectral_centroid(frames[~covered])
 
-        zcr_decision = 0.01 < zcr < 0.3
+        return FrameFeatures(energy, zcr, spectral_centroid, magnitude, self._model_features(frames))
 
-        spectral_decision = spectral_centroid > 500
+    def classify_batch(self, features):
+        """Return (smoothed speech decisions, speech probabilities) for batched features.
 
-        is_speech = energy_decision and (zcr_decision or spectral_decision)
+        Smoothing continues from, and updates, the streaming decision history,
+        so a batch gives the same decisions as classifying its frames in turn.
+        """
+        if features.model_features is not None:
+            probability = self.model.predict_proba(features.model_features)
+            is_speech = probability > self.config.VAD_MODEL_THRESHOLD
+        else:
+            energy_decision = features.energy > self.energy_threshold
+            zcr_decision = (features.zcr > 0.01) & (features.zcr < 0.3)
+            spectral_decision = features.spectral_centroid > 500
+
+            is_speech = energy_decision & (zcr_decision | spectral_decision)
+            probability = self._energy_to_probability_batch(features.energy)
+
+        # Majority over the last smoothing_window decisions, as window sums of a cumulative sum
+        history = np.fromiter(self.recent_decisions, dtype=int, count=len(self.recent_decisions))
+        decisions = np.concatenate((history, is_speech.astype(int)))
+        totals = np.concatenate(([0], np.cumsum(decisions)))
+        ends = np.arange(len(history), len(decisions)) + 1
+        window_sums = totals[ends] - totals[np.maximum(ends - self.smoothing_window, 0)]
+
+        self.recent_decisions.extend(bool(d) for d in is_speech[-self.smoothing_window:])
+        return window_sums > (self.smoothing_window / 2), probability
+
+    def _batches(self, frames):
+        # Bounded batches keep the temporaries of long recordings in cache
+        frames = np.asarray(frames)
+        batch_frames = self.config.VAD_BATCH_FRAMES
+        return [frames[start:start + batch_frames] for start in range(0, max(len(frames), 1), batch_frames)]
+
+    def detect_batch(self, frames):
+        """Smoothed speech decision for each row of an (n_frames, frame_length) array."""
+        return np.concatenate([self.classify_batch(self.extract_features_batch(batch))[0]
+                               for batch in self._batches(frames)])
+
+    def probability_batch(self, frames):
+        """Speech probability for each row of an (n_frames, frame_length) array.
+
+        Like ``get_speech_probability`` this is a query: the frames follow the
+        streamed ones, but the streaming state is left as it was.
+        """
+        if self.model is not None:
+            probabilities = []
+            previous_log_mel = self._previous_log_mel
+            for batch in self._batches(frames):
+                features, previous_log_mel = self._compute_model_features(batch, previous_log_mel)
+                probabilities.append(self.model.predict_proba(features))
+            return np.concatenate(probabilities)
+        return np.concatenate([self._energy_to_probability_batch(self._compute_energy(batch))
+                               for batch in self._batches(frames)])
+
+    def classify(self, features):
+        """Return (smoothed speech decision, speech probability) for one frame's features."""
+        if features.model_features is not None:
+            probability = float(self.model.predict_proba(features.model_features)[0])
+            is_speech = probability > self.config.VAD_MODEL_THRESHOLD
+        else:
+            energy_decision = features.energy > self.energy_threshold
+
+            zcr_decision = 0.01 < features.zcr < 0.3
+
+            spectral_decision = features.spectral_centroid > 500
+
+            is_speech = energy_decision and (zcr_decision or spectral_decision)
+            probability = self._energy_to_probability(features.energy)
 
         self.recent_decisions.append(is_speech)
-        if len(self.recent_decisions) > self.smoothing_window:
-            self.recent_decisions.pop(0)
 
         smoothed_decision = sum(self.recent_decisions) > (self.smoothing_window / 2)
 
+        return smoothed_decision, probability
+
+    def detect(self, audio_frame):
+        smoothed_decision, _ = self.classify(self.extract_features(audio_frame))
         return smoothed_decision
 
     def get_speech_probability(self, audio_frame):
-        energy = self._compute_energy(audio_frame)
+        """Speech probability of one frame, without advancing the streaming state."""
+        if self.model is not None:
+            features, _ = self._compute_model_features(audio_frame, self._previous_log_mel)
+            return float(self.model.predict_proba(features)[0])
+        return self._energy_to_probability(self._compute_energy(audio_frame))
+
+    def _energy_to_probability(self, energy):
+        return float(self._energy_to_probability_batch(energy))
+
+    def _energy_to_probability_batch(self, energy):
         # Compute a robust SNR-like measure for probability
         eps = 1e-12
         noise = self.noise_floor if (self.noise_floor is not None and self.noise_floor > eps) else eps
@@ -86,8 +255,8 @@ class VoiceActivityDetector:
         prob = 1.0 / (1.0 + np.exp(-2.0 * (np.log10(ratio) * 2.0)))
 
         # clip to [0,1]
-        prob = float(np.clip(prob, 0.0, 1.0))
-        return prob
+        return np.clip(prob, 0.0, 1.0)
 
     def reset(self):
-        self.recent_decisions = []
+        self.recent_decisions.clear()
+        self._previous_log_mel = None
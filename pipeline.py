@@ -0,0 +1,521 @@
+"""Generator pipeline for the enhancement chain.
+
+    source -> stage -> stage -> ... -> sink
+
+A source yields Blocks of audio. A stage takes an iterable of Blocks and
+yields them with its work done, and a sink passes them on after writing,
+playing or counting them; ``drain`` pulls the chain to its end. Nothing
+runs until the end of the chain pulls, so a slow consumer holds the whole
+chain back and nothing queues up in between.
+
+    processor = AudioProcessor(enable_capture=False)
+    processor.prepare(16000, noise_data=noise)
+    blocks = wav_source("noisy.wav", block_frames=1024)
+    drain(WavSink("clean.wav", 16000)(processor.enhance(blocks)))
+
+``AudioProcessor`` runs every block, live or offline, through the stages
+returned by ``enhancement_stages``. Its output lags the input by the STFT
+latency; ``AudioProcessor.process_stream`` removes it for offline use.
+Each stage can also be timed on its own with a ``Pipeline`` and a
+``LatencyMonitor``.
+"""
+import threading
+import time
+import wave
+from abc import ABC, abstractmethod
+from collections import deque
+import numpy as np
+from dsp.noise_estimation import expected_magnitude
+from utils.wav_reader import WavReader
+
+
+class Block:
+    """A block of (n_channels, n_samples) int16 audio and what the stages derive from it."""
+
+    __slots__ = ('audio', 'vad_frame_size', 'stft_pending', 'spectra', 'magnitude', 'power',
+                 'is_speech', 'channel_speech', 'channel_probability', 'noise_power', 'gain', 'output')
+
+    def __init__(self, audio, vad_frame_size=None):
+        self.audio = np.atleast_2d(audio)
+        self.vad_frame_size = vad_frame_size or max(self.audio.shape[-1], 1)
+        self.stft_pending = 0
+        self.spectra = None
+        self.magnitude = None
+        self.power = None
+        self.is_speech = None
+        self.channel_speech = None
+        self.channel_probability = None
+        self.noise_power = None
+        self.gain = None
+        self.output = None
+
+    @property
+    def n_samples(self):
+        return self.audio.shape[-1]
+
+
+class Stage(ABC):
+    """One step of the chain; ``process`` does the work for one block."""
+
+    name = 'stage'
+
+    @abstractmethod
+    def process(self, block):
+        """Do this stage's work on ``block`` and return it."""
+
+    def __call__(self, blocks):
+        for block in blocks:
+            yield self.process(block)
+
+
+class Pipeline(Stage):
+    """Stages run in order on each block, each timed into ``latency`` under its name."""
+
+    name = 'pipeline'
+
+    def __init__(self, stages, latency=None):
+        self.stages = list(stages)
+        self.latency = latency
+
+    def process(self, block):
+        for stage in self.stages:
+            if self.latency is None:
+                block = stage.process(block)
+            else:
+                stage_start = time.perf_counter_ns()
+                block = stage.process(block)
+                self.latency.record(stage.name, time.perf_counter_ns() - stage_start)
+        return block
+
+
+# Enhancement stages
+
+class STFTAnalysis(Stage):
+    name = 'stft'
+
+    def __init__(self, stft):
+        self.stft = stft
+
+    def process(self, block):
+        block.stft_pending = self.stft.pending_samples
+        block.spectra = self.stft.analyze(block.audio.astype(np.float32))
+        block.magnitude = np.abs(block.spectra)
+        return block
+
+
+class VoiceActivity(Stage):
+    """One VAD decision per ``vad_frame_size`` samples and channel, spread over the STFT frames it covers."""
+
+    name = 'vad'
+
+    def __init__(self, vads, stft):
+        self.vads = vads
+        self.stft = stft
+
+    def process(self, block):
+        audio, magnitude = block.audio, block.magnitude
+        n_samples, vad_frame_size = block.n_samples, block.vad_frame_size
+
+        # STFT frame f is completed by block sample (f + 1) * hop - pending - 1
+        n_frames = block.spectra.shape[-2]
+        frame_owner = ((np.arange(n_frames) + 1) * self.stft.hop_length - block.stft_pending - 1) // vad_frame_size
+        n_vad_frames = len(range(0, n_samples, vad_frame_size))
+        bounds = np.searchsorted(frame_owner, np.arange(n_vad_frames + 1))
+
+        block.is_speech = np.zeros((len(self.vads), n_frames), dtype=bool)
+        block.channel_speech = np.zeros(len(self.vads), dtype=bool)
+        block.channel_probability = np.zeros(len(self.vads))
+        n_full = n_samples // vad_frame_size
+        for channel, vad in enumerate(self.vads):
+            if n_full > 0:
+                # All whole VAD frames in one feature pass; the centroid reuses the enhancement STFT
+                frames = audio[channel, :n_full * vad_frame_size].reshape(n_full, vad_frame_size)
+                features = vad.extract_features_batch(frames, magnitude[channel], bounds[:n_full + 1],
+                                                      self.stft.fft_size)
+                decisions, probabilities = vad.classify_batch(features)
+                block.is_speech[channel, bounds[0]:bounds[n_full]] = np.repeat(decisions,
+                                                                               np.diff(bounds[:n_full + 1]))
+                block.channel_speech[channel] = decisions[-1]
+                block.channel_probability[channel] = probabilities[-1]
+            if n_full < n_vad_frames:
+                features = vad.extract_features(audio[channel, n_full * vad_frame_size:],
+                                                magnitude[channel, bounds[n_full]:bounds[n_full + 1]],
+                                                self.stft.fft_size)
+                block.channel_speech[channel], block.channel_probability[channel] = vad.classify(features)
+                block.is_speech[channel, bounds[n_full]:bounds[n_full + 1]] = block.channel_speech[channel]
+        return block
+
+
+class NoiseEstimation(Stage):
+    """Track the noise power, gated by the VAD; with ``adaptive`` off the estimate is held."""
+
+    name = 'noise_estimation'
+
+    def __init__(self, noise_estimator, adaptive=True):
+        self.noise_estimator = noise_estimator
+        self.adaptive = adaptive
+
+    def process(self, block):
+        block.power = block.magnitude ** 2
+        if self.adaptive:
+            block.noise_power = self.noise_estimator.update(block.power, block.is_speech)
+        else:
+            block.noise_power = self.noise_estimator.hold(block.power)
+        return block
+
+
+class _GainStage(Stage):
+    """Base for the filters: applied in turn, or with ``fused`` multiplied into one mask for ApplyGain."""
+
+    def __init__(self, fused=False):
+        self.fused = fused
+
+    @abstractmethod
+    def gain(self, magnitude, power, noise_power):
+        """Return the gain mask for the given noisy magnitude and power and the noise power."""
+
+    def process(self, block):
+        if block.noise_power is None or block.spectra.shape[-2] == 0:
+            return block
+
+        if self.fused:
+            # Every gain of a fused chain sees the same noisy spectrum
+            if block.gain is None:
+                block.gain = np.ones_like(block.magnitude)
+            block.gain *= self.gain(block.magnitude, block.power, block.noise_power)
+        else:
+            magnitude = np.abs(block.spectra)
+            block.spectra = block.spectra * self.gain(magnitude, magnitude ** 2, block.noise_power)
+        return block
+
+
+class SpectralSubtractionGain(_GainStage):
+    name = 'spectral_subtraction'
+
+    def __init__(self, spectral_subtraction, fused=False):
+        super().__init__(fused)
+        self.spectral_subtraction = spectral_subtraction
+
+    def gain(self, magnitude, power, noise_power):
+        return self.spectral_subtraction.gain_from_noise(magnitude, expected_magnitude(noise_power))
+
+
+class WienerGain(_GainStage):
+    name = 'wiener'
+
+    def __init__(self, wiener_filter, fused=False):
+        super().__init__(fused)
+        self.wiener_filter = wiener_filter
+
+    def gain(self, magnitude, power, noise_power):
+        return self.wiener_filter.gain_from_noise(power, noise_power)
+
+
+class ApplyGain(Stage):
+    """Apply the mask accumulated by fused gain stages."""
+
+    name = 'gain'
+
+    def process(self, block):
+        if block.gain is not None:
+            block.spectra = block.spectra * block.gain
+        return block
+
+
+class SpectrogramTap(Stage):
+    """Push the first channel's input, output and noise spectra to a SpectrogramBuffer."""
+
+    name = 'spectrogram'
+
+    def __init__(self, spectrogram, noise_estimator):
+        self.spectrogram = spectrogram
+        self.noise_estimator = noise_estimator
+
+    def process(self, block):
+        noise_power = self.noise_estimator.noise_power
+        self.spectrogram.push(block.magnitude[0], np.abs(block.spectra[0]),
+                              None if noise_power is None else noise_power[0])
+        return block
+
+
+class STFTSynthesis(Stage):
+    name = 'istft'
+
+    def __init__(self, stft):
+        self.stft = stft
+
+    def process(self, block):
+        audio_float = np.clip(self.stft.synthesize(block.spectra), -32768, 32767)
+        block.output = audio_float.astype(np.int16)
+        return block
+
+
+# Recording stages, applied to the enhanced output (or the audio of blocks that were not enhanced)
+
+class HighPass(Stage):
+    name = 'hp_filter'
+
+    def __init__(self, highpass_filter):
+        self.highpass_filter = highpass_filter
+
+    def process(self, block):
+        block.output = self.highpass_filter.process(block.audio if block.output is None else block.output)
+        return block
+
+
+class Despike(Stage):
+    """Click suppression; output lags by ``window // 2`` samples until ``flush``."""
+
+    name = 'despike'
+
+    def __init__(self, spike_suppressor):
+        self.spike_suppressor = spike_suppressor
+
+    def process(self, block):
+        block.output = self.spike_suppressor.process(block.audio if block.output is None else block.output)
+        return block
+
+
+# Sources
+
+def capture_source(audio_capture, block_size, channels=1, running=lambda: True):
+    """Yield Blocks read from an AudioCapture until ``running()`` turns false.
+
+    The capture ring buffer absorbs the device while the consumer is busy;
+    a block is only read when the chain asks for the next one.
+    """
+    while running():
+        audio_data = audio_capture.read_audio(timeout=0.1, n_frames=block_size)
+        if audio_data is not None:
+            yield Block(audio_data.reshape(-1, channels).T)
+
+
+def array_source(audio, block_frames):
+    """Yield Blocks of ``block_frames`` samples from an (n_samples,) or (n_samples, n_channels) array.
+
+    Memory-mapped arrays are read one block at a time.
+    """
+    audio = np.asarray(audio, dtype=np.int16)
+    for start in range(0, len(audio), block_frames):
+        yield Block(audio[start:start + block_frames].T)
+
+
+def wav_source(path, block_frames):
+    """Yield Blocks of ``block_frames`` samples from a memory-mapped WAV file."""
+    reader = WavReader(path)
+    for chunk in reader.chunks(block_frames):
+        yield Block(chunk.T)
+
+
+def synthetic_source(duration_seconds, sample_rate, block_frames, snr_db=10.0, seed=0):
+    """Yield Blocks of deterministic synthetic noisy speech, e.g. for timing stages."""
+    from benchmarks.signals import noisy_speech
+    yield from array_source(noisy_speech(duration_seconds, sample_rate, snr_db, seed), block_frames)
+
+
+# Sinks
+
+class WavSink(Stage):
+    """Write each block's output (or its audio, before enhancement) to a WAV file and pass it on."""
+
+    name = 'wav_sink'
+
+    def __init__(self, path, sample_rate):
+        self.path = path
+        self.sample_rate = sample_rate
+        self._wav = None
+
+    def process(self, block):
+        audio = block.audio if block.output is None else block.output
+        if self._wav is None:
+            self._wav = wave.open(self.path, 'wb')
+            self._wav.setnchannels(audio.shape[0])
+            self._wav.setsampwidth(2)
+            self._wav.setframerate(self.sample_rate)
+        self._wav.writeframes(np.ascontiguousarray(audio.T).astype(np.int16).tobytes())
+        return block
+
+    def close(self):
+        if self._wav is not None:
+            self._wav.close()
+            self._wav = None
+
+    def __call__(self, blocks):
+        try:
+            yield from super().__call__(blocks)
+        finally:
+            self.close()
+
+
+class PlaybackSink(Stage):
+    """Send each block's output (or its audio, before enhancement) to the AudioCapture output stream.
+
+    ``enabled()`` is checked for every block, so playback can be switched
+    while the chain runs.
+    """
+
+    name = 'playback'
+
+    def __init__(self, audio_capture, enabled=lambda: True):
+        self.audio_capture = audio_capture
+        self.enabled = enabled
+
+    def process(self, block):
+        if not self.enabled():
+            return block
+        audio = block.audio if block.output is None else block.output
+        self.audio_capture.write_audio(audio.T.reshape(-1))
+        return block
+
+
+class RecordingSink(Stage):
+    """Write block outputs to the attached StreamingWavRecorder, optionally only around speech.
+
+    With ``speech_only``, a segment opens at the first block whose speech
+    probability reaches ``threshold``, preceded by up to ``prebuffer_blocks``
+    blocks that were not recorded, and closes ``post_blocks`` blocks after
+    the probability falls below it. Blocks are high-pass filtered and
+    despiked before they are written; the samples the spike suppressor holds
+    back are written before each segment closes, so no audio carries over
+    into the next one. ``start`` and ``stop`` attach and detach the recorder
+    from another thread under ``lock``.
+    """
+
+    name = 'recording'
+
+    def __init__(self, speech_only=True, threshold=0.5, prebuffer_blocks=3, post_blocks=5,
+                 lock=None, latency=None):
+        self.speech_only = speech_only
+        self.threshold = threshold
+        self.post_blocks = post_blocks
+        self.lock = threading.Lock() if lock is None else lock
+        self.latency = latency
+        self.recorder = None
+        self.filters = None
+        self.spike_suppressor = None
+        self._prebuffer = deque(maxlen=prebuffer_blocks)
+        self._in_segment = False
+        self._post_count = 0
+
+    def start(self, recorder, highpass_filter, spike_suppressor):
+        with self.lock:
+            # Segments restart with each recording; the prebuffer keeps the audio just before it
+            self._in_segment = False
+            self._post_count = 0
+            spike_suppressor.reset()
+            self.spike_suppressor = spike_suppressor
+            self.filters = Pipeline([HighPass(highpass_filter), Despike(spike_suppressor)], self.latency)
+            self.recorder = recorder
+
+    def stop(self):
+        """Write the held-back samples, then detach and return the recorder; the caller holds ``lock``."""
+        recorder = self.recorder
+        if recorder is not None:
+            self._flush()
+        self.recorder = None
+        return recorder
+
+    def process(self, block):
+        audio = block.audio if block.output is None else block.output
+        probability = 0.0 if block.channel_probability is None else float(np.max(block.channel_probability))
+
+        with self.lock:
+            if self.recorder is None:
+                self._prebuffer.append((audio, probability))
+                return block
+
+            record_start = time.perf_counter_ns()
+            if not self.speech_only:
+                self._write(audio, None)
+            elif probability >= self.threshold:
+                if not self._in_segment:
+                    self.recorder.start_segment()
+                    while len(self._prebuffer) > 0:
+                        self._write(*self._prebuffer.popleft())
+                    self._in_segment = True
+                self._write(audio, probability)
+                self._post_count = 0
+            elif self._in_segment and self._post_count < self.post_blocks:
+                self._write(audio, probability)
+                self._post_count += 1
+            else:
+                if self._in_segment:
+                    self._flush()
+                    self.recorder.end_segment()
+                    self._in_segment = False
+                    self._post_count = 0
+                self._prebuffer.append((audio, probability))
+            if self.latency is not None:
+                self.latency.record(self.name, time.perf_counter_ns() - record_start)
+        return block
+
+    def _write(self, audio, probability):
+        # The output starts with the samples held back from the previous block
+        delay = self.spike_suppressor.delay
+        output = self.filters.process(Block(audio)).output
+        self.recorder.write(output.T.reshape(-1), probability, delay)
+
+    def _flush(self):
+        # Resets the suppressor, so the next segment starts with its own audio
+        tail = self.spike_suppressor.flush()
+        if tail.size > 0:
+            self.recorder.write(tail.T.reshape(-1))
+
+
+class StatsSink(Stage):
+    """Count blocks and speech decisions into ``stats``, keyed as in ``AudioProcessor.stats``.
+
+    Blocks that were not enhanced (no ``channel_speech``) count as processed only.
+    """
+
+    name = 'stats'
+
+    def __init__(self, stats=None):
+        self.stats = {} if stats is None else stats
+        for key in ('frames_processed', 'speech_frames', 'noise_frames'):
+            self.stats.setdefault(key, 0)
+
+    def process(self, block):
+        self.stats['frames_processed'] += 1
+        if block.channel_probability is not None:
+            self.stats['current_speech_prob'] = float(np.max(block.channel_probability))
+            self.stats['channel_speech_prob'] = block.channel_probability.tolist()
+        if block.channel_speech is not None:
+            if np.any(block.channel_speech):
+                self.stats['speech_frames'] += 1
+            else:
+                self.stats['noise_frames'] += 1
+        return block
+
+
+class FrameTimer:
+    """Time each block of a chain as one LatencyMonitor frame.
+
+    Wrapped around the source, it records the wait for a block as
+    ``capture_wait`` and everything downstream of it, until the chain asks
+    for the next block, as ``total``.
+    """
+
+    def __init__(self, latency):
+        self.latency = latency
+        self.last_ns = 0
+
+    def __call__(self, blocks):
+        wait_start = time.perf_counter_ns()
+        for block in blocks:
+            start = time.perf_counter_ns()
+            self.latency.begin_frame()
+            self.latency.record('capture_wait', start - wait_start)
+            yield block
+            wait_start = time.perf_counter_ns()
+            self.last_ns = wait_start - start
+            self.latency.record('total', self.last_ns)
+            self.latency.end_frame()
+
+
+def drain(blocks):
+    """Pull a chain to its end and return the number of blocks that came through."""
+    count = 0
+    for _ in blocks:
+        count += 1
+    return count
@@ -0,0 +1,109 @@
+import json
+import signal
+import threading
+import time
+from config import apply_overrides, load_config_file
+
+
+def parse_setting(text):
+    """Parse ``Section.KEY=VALUE`` into ``{'Section': {'KEY': value}}``; VALUE is JSON or a plain string."""
+    name, separator, raw_value = text.partition('=')
+    class_name, dot, key = name.strip().partition('.')
+    if not separator or not dot or not key:
+        raise ValueError(f"Expected SECTION.KEY=VALUE, got '{text}'")
+
+    try:
+        value = json.loads(raw_value)
+    except json.JSONDecodeError:
+        value = raw_value
+    return {class_name: {key: value}}
+
+
+def _install_signal_handlers(stop_event):
+    def handle_signal(signum, frame):
+        print(f"Received signal {signum}, shutting down...", flush=True)
+        stop_event.set()
+
+    signal.signal(signal.SIGINT, handle_signal)
+    signal.signal(signal.SIGTERM, handle_signal)
+    if hasattr(signal, 'SIGHUP'):
+        signal.signal(signal.SIGHUP, handle_signal)
+
+
+def _format_stats(stats):
+    total = stats.get('latency', {}).get('total', {})
+    return (f"Frames: {stats['frames_processed']} | Speech: {stats['speech_frames']} | "
+            f"Noise: {stats['noise_frames']} | Overruns: {stats['overruns']} | "
+            f"Underruns: {stats['underruns']} | p99: {total.get('p99_us', 0.0) / 1000:.2f} ms | "
+            f"Deadline misses: {total.get('deadline_misses', 0)} | Recorded: {stats['recorded_frames']}")
+
+
+def serve(input_device=None, calibrate_seconds=2.0, record=False, duration=0.0, stats_interval=10.0):
+    """Run live enhancement without a GUI until SIGTERM/SIGINT or ``duration`` seconds.
+
+    Only the processing chain is imported; on shutdown an active recording
+    is finalized before the audio device is released.
+    """
+    from audio_processor import AudioProcessor
+
+    stop_event = threading.Event()
+    _install_signal_handlers(stop_event)
+
+    audio_processor = AudioProcessor()
+    try:
+        if calibrate_seconds > 0:
+            audio_processor.audio_capture.start(input_device_index=input_device)
+            audio_processor.calibrate_noise(duration_seconds=calibrate_seconds)
+            audio_processor.audio_capture.stop()
+
+        audio_processor.start_processing(input_device=input_device)
+        if record:
+            audio_processor.start_recording()
+
+        start_time = time.monotonic()
+        while not stop_event.is_set():
+            timeout = stats_interval if stats_interval > 0 else None
+            if duration > 0:
+                remaining = duration - (time.monotonic() - start_time)
+                if remaining <= 0:
+                    break
+                timeout = remaining if timeout is None else min(timeout, remaining)
+
+            if not stop_event.wait(timeout) and stats_interval > 0:
+                print(_format_stats(audio_processor.get_stats()), flush=True)
+
+    finally:
+        # cleanup() stops the recording first, so its files are complete
+        audio_processor.cleanup()
+        print("Service stopped", flush=True)
+
+    return 0
+
+
+def add_serve_arguments(parser):
+    parser.add_argument('--config', help="JSON file of settings, e.g. {\"DSPConfig\": {\"FFT_SIZE\": 1024}}")
+    parser.add_argument('--set', dest='settings', action='append', default=[], metavar='SECTION.KEY=VALUE',
+                        help="Override one setting, applied after --config; may be repeated")
+    parser.add_argument('--input-device', type=int, default=None, help="Input device index (default: system default)")
+    parser.add_argument('--calibrate', type=float, default=2.0, metavar='SECONDS',
+                        help="Calibrate the noise profile for this long before starting (0 = skip)")
+    parser.add_argument('--record', action='store_true', help="Record enhanced speech until shutdown")
+    parser.add_argument('--duration', type=float, default=0.0,
+                        help="Stop after this many seconds (default: run until SIGTERM/SIGINT)")
+    parser.add_argument('--stats-interval', type=float, default=10.0,
+                        help="Seconds between status lines (0 = quiet)")
+
+
+def run_serve(args):
+    # Settings must be in place before any component is constructed
+    try:
+        if args.config:
+            load_config_file(args.config)
+        for setting in args.settings:
+            apply_overrides(parse_setting(setting))
+    except (OSError, ValueError) as e:
+        print(f"Invalid configuration: {e}")
+        return 2
+
+    return serve(args.input_device, calibrate_seconds=args.calibrate, record=args.record,
+                 duration=args.duration, stats_interval=args.stats_interval)
@@ -2,16 +2,44 @@ from .audio_utils import (
     normalize_audio,
     apply_gain,
     compute_snr,
+    segmental_snr,
     save_audio_to_wav,
     load_audio_from_wav,
-    frame_audio
+    get_wav_info,
+    read_wav_range,
+    frame_audio,
+    highpass_filter,
+    HighPassFilter,
+    remove_spikes,
+    SpikeSuppressor
 )
+from .quality import mix_at_snr, log_spectral_distance, stoi
+from .latency import LatencyHistogram, LatencyMonitor
+from .wav_reader import WavReader
+from .segment_index import SpeechSegment, read_segment_index, read_segments, write_segment_index
 
 __all__ = [
     'normalize_audio',
     'apply_gain',
     'compute_snr',
+    'segmental_snr',
+    'mix_at_snr',
+    'log_spectral_distance',
+    'stoi',
     'save_audio_to_wav',
     'load_audio_from_wav',
-    'frame_audio'
+    'get_wav_info',
+    'read_wav_range',
+    'frame_audio',
+    'highpass_filter',
+    'HighPassFilter',
+    'remove_spikes',
+    'SpikeSuppressor',
+    'LatencyHistogram',
+    'LatencyMonitor',
+    'WavReader',
+    'SpeechSegment',
+    'read_segment_index',
+    'read_segments',
+    'write_segment_index'
 ]
@@ -1,6 +1,8 @@
 import numpy as np
 import wave
+from functools import lru_cache
 from scipy import signal
+from .wav_reader import WavReader
 
 
 def normalize_audio(audio_data):
@@ -29,11 +31,35 @@ def compute_snr(signal, noise):
     return snr
 
 
+def segmental_snr(clean, processed, frame_size=512, hop_size=256, min_db=-10.0, max_db=35.0):
+    """Mean per-frame SNR of ``processed`` against ``clean``, each frame clamped to [min_db, max_db].
+
+    Both signals must be time-aligned; frames are compared sample by sample,
+    so the error counts both residual noise and speech distortion.
+    """
+    clean = np.asarray(clean, dtype=np.float64)
+    processed = np.asarray(processed, dtype=np.float64)
+    n_samples = min(len(clean), len(processed))
+
+    clean_frames = frame_audio(clean[:n_samples], frame_size, hop_size)
+    if len(clean_frames) == 0:
+        return float('nan')
+    error_frames = clean_frames - frame_audio(processed[:n_samples], frame_size, hop_size)
+
+    signal_power = np.sum(clean_frames ** 2, axis=1)
+    noise_power = np.sum(error_frames ** 2, axis=1)
+    snr = 10 * np.log10((signal_power + 1e-10) / (noise_power + 1e-10))
+
+    return float(np.mean(np.clip(snr, min_db, max_db)))
+
+
 def save_audio_to_wav(filename, audio_data, sample_rate=16000):
+    """Write int16 audio of shape (n_samples,) or (n_samples, n_channels)."""
     audio_data = np.clip(audio_data, -32768, 32767).astype(np.int16)
+    n_channels = audio_data.shape[1] if audio_data.ndim > 1 else 1
 
     with wave.open(filename, 'wb') as wav_file:
-        wav_file.setnchannels(1)
+        wav_file.setnchannels(n_channels)
         wav_file.setsampwidth(2)
         wav_file.setframerate(sample_rate)
         wav_file.writeframes(audio_data.tobytes())
@@ -41,34 +67,62 @@ def save_audio_to_wav(filename, audio_data, sample_rate=16000):
     print(f"Audio saved to {filename}")
 
 
-def load_audio_from_wav(filename):
-    with wave.open(filename, 'rb') as wav_file:
-        sample_rate = wav_file.getframerate()
-        n_channels = wav_file.getnchannels()
-        audio_data = wav_file.readframes(wav_file.getnframes())
+def load_audio_from_wav(filename, mix_to_mono=True):
+    """Return (audio, sample_rate) of an int16 WAV file.
+
+    Multi-channel audio is mixed to mono unless ``mix_to_mono`` is False, in
+    which case it has shape (n_samples, n_channels). Unmixed audio is a
+    read-only memory-mapped view of the file, so nothing is read up front.
+    """
+    reader = WavReader(filename)
+    if reader.n_channels == 1:
+        return reader.channel(0), reader.sample_rate
+    if mix_to_mono:
+        return reader.mix_to_mono(), reader.sample_rate
+    return reader.data, reader.sample_rate
 
-        audio_array = np.frombuffer(audio_data, dtype=np.int16)
 
-        if n_channels > 1:
-            audio_array = audio_array.reshape(-1, n_channels)
-            audio_array = np.mean(audio_array, axis=1).astype(np.int16)
+def get_wav_info(filename):
+    """Return (n_frames, sample_rate) from a WAV header without reading samples."""
+    reader = WavReader(filename)
+    return reader.n_frames, reader.sample_rate
 
-    return audio_array, sample_rate
+
+def read_wav_range(filename, start, stop, mix_to_mono=True):
+    """Read frames [start, stop) of a WAV file, clamped to its length.
+
+    Channels are handled as in ``load_audio_from_wav``.
+    """
+    reader = WavReader(filename)
+    if reader.n_channels == 1:
+        return reader.channel(0, start, stop), reader.sample_rate
+    if mix_to_mono:
+        return reader.mix_to_mono(start, stop), reader.sample_rate
+    return reader.read(start, stop), reader.sample_rate
 
 
 def frame_audio(audio_data, frame_size, hop_size):
-    frames = []
-    for i in range(0, len(audio_data) - frame_size + 1, hop_size):
-        frame = audio_data[i:i + frame_size]
-        frames.append(frame)
+    """Return a read-only (n_frames, frame_size) strided view of the signal; no data is copied."""
+    audio_data = np.asarray(audio_data)
+    if len(audio_data) < frame_size:
+        return np.empty((0, frame_size), dtype=audio_data.dtype)
 
-    return frames
+    return np.lib.stride_tricks.sliding_window_view(audio_data, frame_size)[::hop_size]
+
+
+@lru_cache(maxsize=None)
+def _design_highpass_sos(sample_rate, cutoff_hz, order):
+    nyq = 0.5 * sample_rate
+    normal_cutoff = min(cutoff_hz / nyq, 0.99)
+    # Cached and shared between callers with the same parameters; never modify in place
+    return signal.butter(order, normal_cutoff, btype='high', analog=False, output='sos')
 
 
 def highpass_filter(audio_data, sample_rate=16000, cutoff_hz=120.0, order=4):
     """Apply a Butterworth high-pass filter to 1-D numpy int16 or float array.
 
     Returns filtered audio as same dtype as input (int16 -> int16, float -> float).
+    Each call starts from rest; use HighPassFilter to filter a stream of frames.
     """
     if len(audio_data) == 0:
         return audio_data
@@ -76,11 +130,129 @@ def highpass_filter(audio_data, sample_rate=16000, cutoff_hz=120.0, order=4):
     is_int = np.issubdtype(np.asarray(audio_data).dtype, np.integer)
     data = np.asarray(audio_data).astype(np.float32)
 
-    nyq = 0.5 * sample_rate
-    normal_cutoff = min(cutoff_hz / nyq, 0.99)
-    b, a = signal.butter(order, normal_cutoff, btype='high', analog=False)
-    filtered = signal.lfilter(b, a, data)
+    sos = _design_highpass_sos(sample_rate, cutoff_hz, order)
+    filtered = signal.sosfilt(sos, data)
 
     if is_int:
         filtered = np.clip(filtered, -32768, 32767).astype(np.int16)
     return filtered
+
+
+class HighPassFilter:
+    """Streaming Butterworth high-pass filter.
+
+    Coefficients are designed once per (rate, cutoff, order) and the filter
+    state carries across ``process`` calls, so consecutive frames join without
+    the start-up transient ``highpass_filter`` produces at every frame edge.
+    Frames may be (n_channels, n_samples); each channel keeps its own state.
+    """
+
+    def __init__(self, sample_rate=16000, cutoff_hz=120.0, order=4):
+        self.sample_rate = sample_rate
+        self.cutoff_hz = cutoff_hz
+        self.order = order
+        self.sos = _design_highpass_sos(sample_rate, cutoff_hz, order)
+        self.reset()
+
+    def reset(self):
+        self._state = None
+
+    def process(self, audio_data):
+        if np.size(audio_data) == 0:
+            return audio_data
+
+        is_int = np.issubdtype(np.asarray(audio_data).dtype, np.integer)
+        data = np.asarray(audio_data).astype(np.float32)
+
+        state_shape = (self.sos.shape[0],) + data.shape[:-1] + (2,)
+        if self._state is None or self._state.shape != state_shape:
+            self._state = np.zeros(state_shape)
+
+        filtered, self._state = signal.sosfilt(self.sos, data, axis=-1, zi=self._state)
+
+        if is_int:
+            filtered = np.clip(filtered, -32768, 32767).astype(np.int16)
+        return filtered
+
+
+def _suppress_spikes(padded, n_out, window, threshold):
+    # Centers are padded[pad:pad + n_out]; each sees a full window of context
+    pad = window // 2
+    if n_out <= 0:
+        return padded[..., :0].copy()
+
+    windows = np.lib.stride_tricks.sliding_window_view(padded, window, axis=-1)[..., :n_out, :]
+    median = np.median(windows, axis=-1)
+    center = padded[..., pad:pad + n_out]
+
+    spikes = np.abs(center.astype(np.float64) - median) > threshold
+    if not np.any(spikes):
+        return center.copy()
+
+    out = center.copy()
+    out[spikes] = median[spikes]
+    return out
+
+
+def remove_spikes(audio_data, window=5, threshold=3000):
+    """Replace samples that differ from their local median by more than ``threshold``.
+
+    Short high-amplitude transients such as mouse clicks show up as isolated
+    spikes; they are replaced by the median of the surrounding ``window``
+    samples (edges are padded by repetition). (n_channels, n_samples) input
+    is filtered along time, per channel.
+    """
+    audio_data = np.asarray(audio_data)
+    if audio_data.size == 0:
+        return audio_data
+
+    pad = window // 2
+    padded = np.pad(audio_data, [(0, 0)] * (audio_data.ndim - 1) + [(pad, pad)], mode='edge')
+    return _suppress_spikes(padded, audio_data.shape[-1], window, threshold)
+
+
+class SpikeSuppressor:
+    """Streaming remove_spikes for a sequence of frames.
+
+    Output lags input by ``window // 2`` samples; call ``flush`` at the end of
+    the stream for the remainder. Concatenated output equals ``remove_spikes``
+    applied to the concatenated input.
+    """
+
+    def __init__(self, window=5, threshold=3000):
+        self.window = window
+        self.threshold = threshold
+        self.reset()
+
+    def reset(self):
+        self._history = None
+
+    @property
+    def delay(self):
+        """Samples of input held back, which the next output starts with."""
+        return 0 if self._history is None else self.window // 2
+
+    def process(self, audio_frame):
+        audio_frame = np.asarray(audio_frame)
+        pad = self.window // 2
+
+        if self._history is None:
+            if audio_frame.size == 0:
+                return audio_frame
+            self._history = np.repeat(audio_frame[..., :1], pad, axis=-1)
+
+        data = np.concatenate((self._history, audio_frame), axis=-1)
+        n_out = max(0, data.shape[-1] - 2 * pad)
+        self._history = data[..., n_out:]
+
+        return _suppress_spikes(data, n_out, self.window, self.threshold)
+
+    def flush(self):
+        if self._history is None:
+            return np.empty(0, dtype=np.int16)
+
+        pad = self.window // 2
+        data = np.pad(self._history, [(0, 0)] * (self._history.ndim - 1) + [(0, pad)], mode='edge')
+        self.reset()
+
+        return _suppress_spikes(data, data.shape[-1] - 2 * pad, self.window, self.threshold)
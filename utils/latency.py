@@ -0,0 +1,134 @@
+import bisect
+import json
+import time
+import numpy as np
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram with log-spaced bucket edges in microseconds.
+
+    Recording is O(log buckets) and allocation-free; percentiles are
+    interpolated inside the bucket that contains them.
+    """
+
+    def __init__(self, bucket_edges_us, deadline_us=None):
+        self.bucket_edges_us = list(bucket_edges_us)
+        self.deadline_us = deadline_us
+        self.reset()
+
+    def reset(self):
+        # counts[i] holds samples in (edges[i-1], edges[i]]; the last bucket is open-ended
+        self.counts = [0] * (len(self.bucket_edges_us) + 1)
+        self.count = 0
+        self.total_us = 0.0
+        self.max_us = 0.0
+        self.deadline_misses = 0
+
+    def record(self, elapsed_us):
+        self.counts[bisect.bisect_left(self.bucket_edges_us, elapsed_us)] += 1
+        self.count += 1
+        self.total_us += elapsed_us
+        if elapsed_us > self.max_us:
+            self.max_us = elapsed_us
+        if self.deadline_us is not None and elapsed_us > self.deadline_us:
+            self.deadline_misses += 1
+
+    def percentile(self, q):
+        if self.count == 0:
+            return 0.0
+
+        target = q / 100.0 * self.count
+        cumulative = 0
+        for i, count in enumerate(self.counts):
+            if count > 0 and cumulative + count >= target:
+                low = self.bucket_edges_us[i - 1] if i > 0 else 0.0
+                high = self.bucket_edges_us[i] if i < len(self.bucket_edges_us) else self.max_us
+                high = min(high, self.max_us)
+                return low + (high - low) * (target - cumulative) / count
+            cumulative += count
+        return self.max_us
+
+    def summary(self):
+        summary = {
+            'count': self.count,
+            'mean_us': self.total_us / self.count if self.count else 0.0,
+            'max_us': self.max_us,
+            'p50_us': self.percentile(50),
+            'p95_us': self.percentile(95),
+            'p99_us': self.percentile(99),
+        }
+        if self.deadline_us is not None:
+            summary['deadline_misses'] = self.deadline_misses
+        return summary
+
+
+class LatencyMonitor:
+    """Per-stage timers feeding one LatencyHistogram per stage.
+
+    Callers time a stage with ``time.perf_counter_ns()`` and pass the
+    elapsed nanoseconds to ``record``. ``begin_frame`` and ``end_frame``
+    bracket a frame; when ``jsonl_path`` is set, the stage timings recorded
+    inside it are appended as one JSON line. Only ``deadline_stage``, the
+    end-to-end frame time, counts deadline misses against the frame period:
+    a per-stage count would also flag stages such as the capture wait,
+    which takes about one period by design.
+    """
+
+    def __init__(self, deadline_ms=None, jsonl_path=None, buckets_per_decade=10, deadline_stage='total'):
+        # 1 us to 10 s
+        self.bucket_edges_us = np.logspace(0, 7, 7 * buckets_per_decade + 1).tolist()
+        self.deadline_us = None if deadline_ms is None else deadline_ms * 1000.0
+        self.deadline_stage = deadline_stage
+        self.histograms = {}
+        self.frames = 0
+
+        self._frame_open = False
+        self._frame_timings = {}
+        self._jsonl_file = None
+        if jsonl_path:
+            self._jsonl_file = open(jsonl_path, 'a')
+
+    def set_deadline(self, deadline_ms):
+        self.deadline_us = deadline_ms * 1000.0
+        histogram = self.histograms.get(self.deadline_stage)
+        if histogram is not None:
+            histogram.deadline_us = self.deadline_us
+
+    def record(self, stage, elapsed_ns):
+        elapsed_us = elapsed_ns / 1000.0
+        histogram = self.histograms.get(stage)
+        if histogram is None:
+            deadline_us = self.deadline_us if stage == self.deadline_stage else None
+            histogram = LatencyHistogram(self.bucket_edges_us, deadline_us)
+            self.histograms[stage] = histogram
+        histogram.record(elapsed_us)
+
+        # Timings recorded outside a frame (e.g. offline blocks) only go to the histograms
+        if self._frame_open and self._jsonl_file is not None:
+            self._frame_timings[stage] = self._frame_timings.get(stage, 0.0) + elapsed_us
+
+    def begin_frame(self):
+        self._frame_open = True
+        self._frame_timings = {}
+
+    def end_frame(self):
+        self.frames += 1
+        if self._frame_open and self._jsonl_file is not None:
+            line = {'frame': self.frames, 'time': time.time(), 'stages_us': self._frame_timings}
+            self._jsonl_file.write(json.dumps(line) + "\n")
+        self._frame_open = False
+        self._frame_timings = {}
+
+    def summary(self):
+        # list() so a stage first seen by the processing thread cannot break iteration
+        return {stage: histogram.summary() for stage, histogram in list(self.histograms.items())}
+
+    def reset(self):
+        self.frames = 0
+        for histogram in self.histograms.values():
+            histogram.reset()
+
+    def close(self):
+        if self._jsonl_file is not None:
+            self._jsonl_file.close()
+            self._jsonl_file = None
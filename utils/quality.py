@@ -0,0 +1,132 @@
+import numpy as np
+from scipy import signal
+from .audio_utils import frame_audio
+
+
+def mix_at_snr(clean, noise, snr_db):
+    """Scale ``noise`` so that ``clean + noise`` has the given SNR.
+
+    The noise is looped or cut to the length of ``clean``. Returns
+    ``(mixture, scaled_noise)`` as float64 arrays.
+    """
+    clean = np.asarray(clean, dtype=np.float64)
+    noise = np.resize(np.asarray(noise, dtype=np.float64), len(clean))
+
+    clean_power = np.mean(clean ** 2)
+    noise_power = np.mean(noise ** 2)
+    if noise_power == 0:
+        return clean.copy(), noise
+
+    noise = noise * np.sqrt(clean_power / noise_power / 10 ** (snr_db / 10))
+    return clean + noise, noise
+
+
+def log_spectral_distance(clean, processed, fft_size=512, hop_size=256, dynamic_range_db=80.0):
+    """Mean over frames of the RMS difference between log power spectra, in dB.
+
+    Both spectra are floored ``dynamic_range_db`` below the clean peak, so
+    digital silence does not dominate the distance.
+    """
+    clean = np.asarray(clean, dtype=np.float64)
+    processed = np.asarray(processed, dtype=np.float64)
+    n_samples = min(len(clean), len(processed))
+
+    window = signal.get_window('hann', fft_size)
+    clean_power = np.abs(np.fft.rfft(frame_audio(clean[:n_samples], fft_size, hop_size) * window)) ** 2
+    processed_power = np.abs(np.fft.rfft(frame_audio(processed[:n_samples], fft_size, hop_size) * window)) ** 2
+    if len(clean_power) == 0:
+        return float('nan')
+
+    floor = np.max(clean_power) * 10 ** (-dynamic_range_db / 10) + 1e-10
+    difference = 10 * np.log10(np.maximum(clean_power, floor)) - 10 * np.log10(np.maximum(processed_power, floor))
+    return float(np.mean(np.sqrt(np.mean(difference ** 2, axis=1))))
+
+
+# STOI constants from Taal et al., "An Algorithm for Intelligibility Prediction
+# of Time-Frequency Weighted Noisy Speech", IEEE TASLP 2011
+_STOI_RATE = 10000
+_STOI_FRAME = 256
+_STOI_FFT = 512
+_STOI_BANDS = 15
+_STOI_MIN_FREQ = 150
+_STOI_SEGMENT = 30
+_STOI_BETA_DB = -15
+_STOI_DYNAMIC_RANGE_DB = 40
+
+
+def _third_octave_matrix():
+    freqs = np.fft.rfftfreq(_STOI_FFT, 1.0 / _STOI_RATE)
+    centers = _STOI_MIN_FREQ * 2.0 ** (np.arange(_STOI_BANDS) / 3)
+    low_bins = np.argmin(np.abs(freqs[:, None] - centers * 2 ** (-1 / 6)), axis=0)
+    high_bins = np.argmin(np.abs(freqs[:, None] - centers * 2 ** (1 / 6)), axis=0)
+
+    matrix = np.zeros((_STOI_BANDS, len(freqs)))
+    for band, (low, high) in enumerate(zip(low_bins, high_bins)):
+        matrix[band, low:high] = 1
+    return matrix
+
+
+def _remove_silent_frames(clean, processed, window, hop):
+    clean_frames = frame_audio(clean, _STOI_FRAME, hop) * window
+    processed_frames = frame_audio(processed, _STOI_FRAME, hop) * window
+
+    energy = 20 * np.log10(np.linalg.norm(clean_frames, axis=1) + 1e-10)
+    keep = energy > np.max(energy) - _STOI_DYNAMIC_RANGE_DB
+
+    def overlap_add(frames):
+        output = np.zeros((len(frames) + 1) * hop)
+        for i, frame in enumerate(frames):
+            output[i * hop:i * hop + _STOI_FRAME] += frame
+        return output
+
+    return overlap_add(clean_frames[keep]), overlap_add(processed_frames[keep])
+
+
+def stoi(clean, processed, sample_rate):
+    """Short-time objective intelligibility of ``processed`` against ``clean``, roughly 0..1.
+
+    Follows the published STOI algorithm (10 kHz, one-third octave bands,
+    384 ms segments, clipped envelope correlation). Scores track the
+    reference implementation closely but are not guaranteed to match it
+    to the last digit.
+    """
+    clean = np.asarray(clean, dtype=np.float64)
+    processed = np.asarray(processed, dtype=np.float64)
+    n_samples = min(len(clean), len(processed))
+    clean, processed = clean[:n_samples], processed[:n_samples]
+
+    if sample_rate != _STOI_RATE:
+        divisor = np.gcd(int(sample_rate), _STOI_RATE)
+        clean = signal.resample_poly(clean, _STOI_RATE // divisor, sample_rate // divisor)
+        processed = signal.resample_poly(processed, _STOI_RATE // divisor, sample_rate // divisor)
+
+    hop = _STOI_FRAME // 2
+    window = np.hanning(_STOI_FRAME + 2)[1:-1]
+    clean, processed = _remove_silent_frames(clean, processed, window, hop)
+
+    band_matrix = _third_octave_matrix()
+    clean_spectrum = np.abs(np.fft.rfft(frame_audio(clean, _STOI_FRAME, hop) * window, _STOI_FFT)) ** 2
+    processed_spectrum = np.abs(np.fft.rfft(frame_audio(processed, _STOI_FRAME, hop) * window, _STOI_FFT)) ** 2
+
+    if len(clean_spectrum) < _STOI_SEGMENT:
+        raise ValueError("Signal too short for STOI: need at least "
+                         f"{_STOI_SEGMENT} non-silent frames at {_STOI_RATE} Hz")
+
+    # Band envelopes, shape (bands, frames), cut into overlapping segments (bands, segments, N)
+    clean_bands = np.sqrt(band_matrix @ clean_spectrum.T)
+    processed_bands = np.sqrt(band_matrix @ processed_spectrum.T)
+    clean_segments = np.lib.stride_tricks.sliding_window_view(clean_bands, _STOI_SEGMENT, axis=1)
+    processed_segments = np.lib.stride_tricks.sliding_window_view(processed_bands, _STOI_SEGMENT, axis=1)
+
+    # Normalize the processed envelope to the clean energy and clip it
+    scale = (np.linalg.norm(clean_segments, axis=-1, keepdims=True)
+             / (np.linalg.norm(processed_segments, axis=-1, keepdims=True) + 1e-10))
+    clip_limit = clean_segments * (1 + 10 ** (-_STOI_BETA_DB / 20))
+    processed_segments = np.minimum(processed_segments * scale, clip_limit)
+
+    clean_segments = clean_segments - np.mean(clean_segments, axis=-1, keepdims=True)
+    processed_segments = processed_segments - np.mean(processed_segments, axis=-1, keepdims=True)
+    correlation = np.sum(clean_segments * processed_segments, axis=-1) / (
+        np.linalg.norm(clean_segments, axis=-1) * np.linalg.norm(processed_segments, axis=-1) + 1e-10)
+
+    return float(np.mean(correlation))
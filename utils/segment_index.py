@@ -0,0 +1,95 @@
+import csv
+import json
+import os
+from .wav_reader import WavReader
+
+
+SEGMENT_INDEX_FORMATS = ('json', 'csv')
+
+
+class SpeechSegment:
+    """A stretch of speech in a WAV file, as sample frames [start, end)."""
+
+    __slots__ = ('start', 'end', 'mean_probability')
+
+    def __init__(self, start, end, mean_probability=None):
+        self.start = int(start)
+        self.end = int(end)
+        self.mean_probability = None if mean_probability is None else float(mean_probability)
+
+    def __repr__(self):
+        return f"SpeechSegment({self.start}, {self.end}, {self.mean_probability})"
+
+
+def segment_index_path(wav_path, index_format='json'):
+    """Sidecar path of a recording's segment index: ``name.wav`` -> ``name.segments.json``."""
+    if index_format not in SEGMENT_INDEX_FORMATS:
+        raise ValueError(f"Unknown segment index format '{index_format}', "
+                         f"expected one of {', '.join(SEGMENT_INDEX_FORMATS)}")
+    return f"{os.path.splitext(wav_path)[0]}.segments.{index_format}"
+
+
+def find_segment_index(wav_path):
+    """Return the path of the segment index next to ``wav_path``, or None."""
+    for index_format in SEGMENT_INDEX_FORMATS:
+        path = segment_index_path(wav_path, index_format)
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def write_segment_index(wav_path, segments, sample_rate, index_format='json'):
+    """Write the sidecar index of ``segments`` next to ``wav_path`` and return its path."""
+    path = segment_index_path(wav_path, index_format)
+    rows = [{'start': s.start, 'end': s.end,
+             'start_seconds': round(s.start / sample_rate, 6), 'end_seconds': round(s.end / sample_rate, 6),
+             'mean_probability': None if s.mean_probability is None else round(s.mean_probability, 4)}
+            for s in segments]
+
+    # Write then rename, so a reader never sees a partial index
+    temporary_path = f"{path}.{os.getpid()}.tmp"
+    with open(temporary_path, 'w', newline='') as f:
+        if index_format == 'json':
+            json.dump({'wav': os.path.basename(wav_path), 'sample_rate': sample_rate, 'segments': rows},
+                      f, indent=1)
+        else:
+            writer = csv.DictWriter(f, fieldnames=['start', 'end', 'start_seconds', 'end_seconds',
+                                                   'mean_probability'])
+            writer.writeheader()
+            writer.writerows(rows)
+    os.replace(temporary_path, path)
+    return path
+
+
+def read_segment_index(path):
+    """Return the SpeechSegments listed in a JSON or CSV segment index."""
+    with open(path, newline='') as f:
+        if path.endswith('.json'):
+            rows = json.load(f)['segments']
+        else:
+            rows = [{key: (value if value != '' else None) for key, value in row.items()}
+                    for row in csv.DictReader(f)]
+    return [SpeechSegment(row['start'], row['end'], row['mean_probability']) for row in rows]
+
+
+def read_segments(wav_path, segments=None, start_seconds=0.0):
+    """Yield (segment, audio) for each speech segment of a WAV file.
+
+    ``segments`` defaults to the file's sidecar index. ``audio`` is a
+    memory-mapped (n_samples, n_channels) int16 view of the segment, so only
+    the speech is read from disk.
+    Segments ending before ``start_seconds`` are skipped.
+    """
+    if segments is None:
+        index_path = find_segment_index(wav_path)
+        if index_path is None:
+            raise FileNotFoundError(f"No segment index for {wav_path}")
+        segments = read_segment_index(index_path)
+
+    reader = WavReader(wav_path)
+    seek = int(start_seconds * reader.sample_rate)
+    for segment in segments:
+        if segment.end <= seek:
+            continue
+        yield segment, reader.read(segment.start, segment.end)
+
@@ -0,0 +1,81 @@
+import threading
+import numpy as np
+
+
+class SpectrogramBuffer:
+    """Bounded, decimated history of the DSP's own magnitude spectra for display.
+
+    The processing thread pushes the STFT magnitudes it already computed, so
+    monitoring needs no extra FFTs. Only every ``decimation``-th frame is kept,
+    bins are averaged down to ``n_display_bins`` and converted to dB, and the
+    result goes into preallocated rings of ``history`` columns. The GUI reads
+    a consistent copy with ``snapshot`` whenever ``version`` has moved.
+    """
+
+    def __init__(self, n_bins, sample_rate, history=200, n_display_bins=128, decimation=2):
+        self.history = int(history)
+        self.decimation = max(1, int(decimation))
+        self.group = max(1, n_bins // n_display_bins)
+        self.n_display_bins = n_bins // self.group
+        self.n_bins = n_bins
+        self.sample_rate = sample_rate
+
+        # Columns are written twice, ``history`` apart, so the ordered history is one slice
+        self._input = np.full((self.n_display_bins, 2 * self.history), np.nan)
+        self._output = np.full((self.n_display_bins, 2 * self.history), np.nan)
+        self._noise = np.full(self.n_display_bins, np.nan)
+        self._position = 0
+        self._phase = 0
+        self._lock = threading.Lock()
+        self.version = 0
+
+    @property
+    def frequencies(self):
+        """Center frequency of each display bin in Hz."""
+        bin_width = self.sample_rate / (2.0 * (self.n_bins - 1))
+        return (np.arange(self.n_display_bins) + 0.5) * self.group * bin_width
+
+    def _to_display_db(self, magnitude, power=False):
+        grouped = magnitude[..., :self.n_display_bins * self.group]
+        grouped = grouped.reshape(grouped.shape[:-1] + (self.n_display_bins, self.group)).mean(axis=-1)
+        return (10.0 if power else 20.0) * np.log10(grouped + 1e-10)
+
+    def push(self, input_magnitude, output_magnitude, noise_power=None):
+        """Add magnitude frames of shape (n_frames, n_bins) and the current noise power estimate."""
+        n_frames = len(input_magnitude)
+        keep = np.arange(self._phase, n_frames, self.decimation)
+        self._phase = (self._phase - n_frames) % self.decimation
+
+        keep = keep[-self.history:]
+        input_db = self._to_display_db(input_magnitude[keep]).T
+        output_db = self._to_display_db(output_magnitude[keep]).T
+
+        with self._lock:
+            if len(keep) > 0:
+                columns = (self._position + np.arange(len(keep))) % self.history
+                self._input[:, columns] = self._input[:, columns + self.history] = input_db
+                self._output[:, columns] = self._output[:, columns + self.history] = output_db
+                self._position = (self._position + len(keep)) % self.history
+
+            if noise_power is not None:
+                self._noise[:] = self._to_display_db(noise_power, power=True)
+            self.version += 1
+
+    def snapshot(self):
+        """Return copies of (input_db, output_db, noise_db).
+
+        The spectrograms have shape (n_display_bins, history), oldest column first.
+        """
+        with self._lock:
+            columns = slice(self._position, self._position + self.history)
+            return (self._input[:, columns].copy(), self._output[:, columns].copy(),
+                    self._noise.copy())
+
+    def clear(self):
+        with self._lock:
+            self._input.fill(np.nan)
+            self._output.fill(np.nan)
+            self._noise.fill(np.nan)
+            self._position = 0
+            self._phase = 0
+            self.version += 1
@@ -0,0 +1,104 @@
+import os
+import struct
+import numpy as np
+
+
+class WavReader:
+    """Memory-mapped reader for 16-bit PCM WAV files of any size.
+
+    The RIFF header is parsed directly and the samples are exposed as a
+    read-only int16 ``np.memmap`` of shape (n_frames, n_channels), so
+    nothing is read until it is used and slices, channels and chunks are
+    views into the file. Memory stays bounded however large the file is.
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.data_offset, self.n_frames, self.n_channels, self.sample_rate = self._parse_header()
+        self._data = None
+
+    @property
+    def duration(self):
+        return self.n_frames / self.sample_rate
+
+    def _parse_header(self):
+        file_size = os.path.getsize(self.filename)
+        with open(self.filename, 'rb') as f:
+            riff = f.read(12)
+            if len(riff) < 12 or riff[:4] != b'RIFF' or riff[8:12] != b'WAVE':
+                raise ValueError(f"{self.filename}: not a RIFF WAVE file")
+
+            fmt = None
+            while True:
+                header = f.read(8)
+                if len(header) < 8:
+                    raise ValueError(f"{self.filename}: no data chunk")
+                chunk_id, chunk_size = header[:4], struct.unpack('<I', header[4:])[0]
+
+                if chunk_id == b'fmt ':
+                    if chunk_size < 16:
+                        raise ValueError(f"{self.filename}: truncated fmt chunk")
+                    fmt = struct.unpack('<HHIIHH', f.read(16))
+                    f.seek(chunk_size - 16 + (chunk_size & 1), os.SEEK_CUR)
+                elif chunk_id == b'data':
+                    if fmt is None:
+                        raise ValueError(f"{self.filename}: data chunk before fmt chunk")
+                    format_tag, n_channels, sample_rate, _, _, bits = fmt
+                    # 0xFFFE is WAVE_FORMAT_EXTENSIBLE, which many tools write for multi-channel PCM
+                    if format_tag not in (1, 0xFFFE) or bits != 16 or n_channels == 0:
+                        raise ValueError(f"{self.filename}: only 16-bit PCM is supported")
+                    offset = f.tell()
+                    # A recording still being written may not have its sizes patched yet
+                    data_size = min(chunk_size, file_size - offset)
+                    return offset, data_size // (2 * n_channels), n_channels, sample_rate
+                else:
+                    # Chunks are padded to an even size
+                    f.seek(chunk_size + (chunk_size & 1), os.SEEK_CUR)
+
+    @property
+    def data(self):
+        """All samples as a read-only int16 memmap of shape (n_frames, n_channels)."""
+        if self._data is None:
+            if self.n_frames == 0:
+                self._data = np.empty((0, self.n_channels), dtype=np.int16)
+            else:
+                self._data = np.memmap(self.filename, dtype='<i2', mode='r', offset=self.data_offset,
+                                       shape=(self.n_frames, self.n_channels))
+        return self._data
+
+    def read(self, start=0, stop=None):
+        """Frames [start, stop), clamped to the file, as a (n_samples, n_channels) view."""
+        stop = self.n_frames if stop is None else stop
+        start = max(0, min(start, self.n_frames))
+        return self.data[start:max(start, min(stop, self.n_frames))]
+
+    def channel(self, index, start=0, stop=None):
+        """One channel of frames [start, stop) as a strided (n_samples,) view; no data is copied."""
+        return self.read(start, stop)[:, index]
+
+    def chunks(self, chunk_frames, start=0, stop=None):
+        """Yield consecutive (n_samples, n_channels) views of at most ``chunk_frames`` frames."""
+        audio = self.read(start, stop)
+        for offset in range(0, len(audio), chunk_frames):
+            yield audio[offset:offset + chunk_frames]
+
+    def mix_to_mono(self, start=0, stop=None, chunk_frames=1 << 20):
+        """Channel mean of frames [start, stop) as int16, computed chunk by chunk."""
+        audio = self.read(start, stop)
+        if self.n_channels == 1:
+            return np.array(audio[:, 0])
+
+        mono = np.empty(len(audio), dtype=np.int16)
+        for offset in range(0, len(audio), chunk_frames):
+            mono[offset:offset + chunk_frames] = np.mean(audio[offset:offset + chunk_frames], axis=1)
+        return mono
+
+    def close(self):
+        # The mapping itself closes once no view of it is left
+        self._data = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,195 @@
+import os
+import queue
+import threading
+import time
+import wave
+from datetime import datetime
+import numpy as np
+from .segment_index import SEGMENT_INDEX_FORMATS, SpeechSegment, write_segment_index
+
+
+class StreamingWavRecorder:
+    """Append int16 frames to WAV files from a dedicated writer thread.
+
+    ``write`` only enqueues, so the caller never waits on the disk. The
+    header is patched after every write and the file flushed every
+    ``flush_seconds``, so a crash loses at most that much audio. Files rotate
+    once they would exceed ``max_file_seconds`` or ``max_file_bytes`` (0
+    disables either limit), keeping memory and file sizes bounded for
+    sessions of any length.
+
+    Speech segments marked with ``start_segment``/``end_segment`` are
+    written as a sidecar index next to each file when it is closed, with
+    offsets relative to that file (see utils.segment_index).
+    """
+
+    def __init__(self, directory, prefix="enhanced_speech", sample_rate=16000, channels=1,
+                 max_file_seconds=0, max_file_bytes=0, flush_seconds=2.0, queue_frames=256,
+                 segment_index_format=None):
+        self.directory = directory
+        self.prefix = prefix
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.flush_seconds = flush_seconds
+        if segment_index_format not in (None,) + SEGMENT_INDEX_FORMATS:
+            raise ValueError(f"Unknown segment index format '{segment_index_format}', "
+                             f"expected one of {', '.join(SEGMENT_INDEX_FORMATS)}")
+        self.segment_index_format = segment_index_format
+
+        limits = []
+        if max_file_seconds:
+            limits.append(int(max_file_seconds * sample_rate))
+        if max_file_bytes:
+            limits.append((int(max_file_bytes) - 44) // (2 * channels))
+        self.max_file_frames = max(1, min(limits)) if limits else None
+
+        self.paths = []
+        self.frames_queued = 0
+        self.dropped_frames = 0
+        self.samples_written = 0
+        self.error = None
+
+        # Segments as [start, end, [(offset, speech probability) of each frame]] in sample frames
+        # of the whole session; end is None while the segment is open
+        self.segments = []
+        self._segment_lock = threading.Lock()
+        self._samples_queued = 0
+        self._file_start = 0
+
+        self._queue = queue.Queue(maxsize=queue_frames)
+        self._thread = None
+        self._timestamp = None
+        self._file = None
+        self._wav = None
+        self._file_frames = 0
+        self._last_flush = 0.0
+
+    def start(self):
+        os.makedirs(self.directory, exist_ok=True)
+        self._timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        self._thread = threading.Thread(target=self._writer_loop, daemon=True)
+        self._thread.start()
+
+    def write(self, audio_frame, speech_probability=None, delay=0):
+        """Queue interleaved samples; ``speech_probability`` belongs to the audio starting
+        ``delay`` samples into them, e.g. after samples a filter held back."""
+        audio_frame = np.asarray(audio_frame, dtype=np.int16)
+        try:
+            self._queue.put_nowait(audio_frame)
+            self.frames_queued += 1
+        except queue.Full:
+            self.dropped_frames += 1
+            return
+
+        # Offsets count only queued samples, which the writer thread writes in order
+        if speech_probability is not None:
+            with self._segment_lock:
+                if self.segments and self.segments[-1][1] is None:
+                    self.segments[-1][2].append((self._samples_queued + delay, speech_probability))
+        self._samples_queued += audio_frame.size // self.channels
+
+    def start_segment(self):
+        """Mark the next written sample as the start of a speech segment."""
+        with self._segment_lock:
+            if not self.segments or self.segments[-1][1] is not None:
+                self.segments.append([self._samples_queued, None, []])
+
+    def end_segment(self):
+        """Close the open speech segment after the last written sample."""
+        with self._segment_lock:
+            if self.segments and self.segments[-1][1] is None:
+                self.segments[-1][1] = self._samples_queued
+
+    def stop(self, timeout=5.0):
+        """Finish writing everything queued, close the current file and return all paths."""
+        self.end_segment()
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join(timeout=timeout)
+            self._thread = None
+        return list(self.paths)
+
+    def _writer_loop(self):
+        while True:
+            audio_frame = self._queue.get()
+            if audio_frame is None:
+                break
+            if self.error is not None:
+                continue
+
+            try:
+                self._write_frame(audio_frame)
+            except (OSError, wave.Error) as e:
+                self.error = e
+                print(f"Error writing recording: {e}")
+
+        try:
+            self._close_file()
+        except (OSError, wave.Error) as e:
+            print(f"Error closing recording: {e}")
+
+    def _write_frame(self, audio_frame):
+        frames = audio_frame.reshape(-1, self.channels) if self.channels > 1 else audio_frame
+
+        while len(frames) > 0:
+            if self._wav is None:
+                self._open_file()
+
+            take = len(frames)
+            if self.max_file_frames is not None:
+                take = min(take, self.max_file_frames - self._file_frames)
+
+            # wave patches the RIFF/data sizes after every write, so the file is valid at all times
+            self._wav.writeframes(frames[:take].tobytes())
+            self._file_frames += take
+            self.samples_written += take
+            frames = frames[take:]
+
+            if self.max_file_frames is not None and self._file_frames >= self.max_file_frames:
+                self._close_file()
+
+        if time.monotonic() - self._last_flush >= self.flush_seconds and self._file is not None:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._last_flush = time.monotonic()
+
+    def _open_file(self):
+        part = len(self.paths) + 1
+        suffix = "" if part == 1 else f"_part{part}"
+        path = os.path.join(self.directory, f"{self.prefix}_{self._timestamp}{suffix}.wav")
+
+        self._file = open(path, 'wb')
+        self._wav = wave.open(self._file, 'wb')
+        self._wav.setnchannels(self.channels)
+        self._wav.setsampwidth(2)
+        self._wav.setframerate(self.sample_rate)
+        self._file_start = self.samples_written
+        self._file_frames = 0
+        self._last_flush = time.monotonic()
+        self.paths.append(path)
+
+    def _file_segments(self):
+        # Segments overlapping the current file, clipped to it; open ones run to its end
+        file_end = self._file_start + self._file_frames
+        file_segments = []
+        with self._segment_lock:
+            for start, end, probabilities in self.segments:
+                end = file_end if end is None else min(end, file_end)
+                start = max(start, self._file_start)
+                if start < end:
+                    # A frame split across files counts for the file it starts in
+                    in_file = [p for offset, p in probabilities if self._file_start <= offset < file_end]
+                    file_segments.append(SpeechSegment(start - self._file_start, end - self._file_start,
+                                                       sum(in_file) / len(in_file) if in_file else None))
+        return file_segments
+
+    def _close_file(self):
+        if self._wav is not None:
+            self._wav.close()
+            self._wav = None
+            if self.segment_index_format is not None:
+                write_segment_index(self.paths[-1], self._file_segments(), self.sample_rate,
+                                    self.segment_index_format)
+        if self._file is not None:
+            self._file.close()
+            self._file = None